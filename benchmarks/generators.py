@@ -0,0 +1,113 @@
+"""
+Generators of valid synthetic puzzle inputs at a configurable scale.
+
+Every generator writes to a text file and is deterministic for a given scale and seed.
+"""
+import random
+from typing import Callable, Dict, TextIO
+
+WORDS = ["one", "two", "three", "four", "five", "six", "seven", "eight", "nine"]
+SYMBOLS = "*#+$/@=%&-"
+MAP_NAMES = ["seed", "soil", "fertilizer", "water", "light", "temperature", "humidity", "location"]
+
+
+def generate_calibration(file: TextIO, scale: int, rng: random.Random) -> None:
+    """
+    Writes 'scale' calibration lines mixing letters, digits and spelled digits.
+    """
+    for _ in range(scale):
+        tokens = [rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(3, 20))]
+        for _ in range(rng.randint(1, 4)):
+            token = str(rng.randint(0, 9)) if rng.random() < 0.5 else rng.choice(WORDS)
+            tokens.insert(rng.randint(0, len(tokens)), token)
+        # every line has at least a plain digit, as required by part 1
+        tokens.insert(rng.randint(0, len(tokens)), str(rng.randint(1, 9)))
+        file.write("".join(tokens) + "\n")
+
+
+def generate_games(file: TextIO, scale: int, rng: random.Random) -> None:
+    """
+    Writes 'scale' games of one to six sets of red, green and blue cubes.
+    """
+    for id in range(1, scale + 1):
+        sets = []
+        for _ in range(rng.randint(1, 6)):
+            colors = rng.sample(["red", "green", "blue"], rng.randint(1, 3))
+            sets.append(", ".join(f"{rng.randint(1, 20)} {color}" for color in colors))
+        file.write(f"Game {id}: {'; '.join(sets)}\n")
+
+
+def generate_schematic(file: TextIO, scale: int, rng: random.Random) -> None:
+    """
+    Writes a square schematic of about 'scale' cells of periods, numbers and symbols.
+    """
+    width = max(3, int(scale ** 0.5))
+    for _ in range(max(1, scale // width)):
+        row = []
+        while len(row) < width:
+            draw = rng.random()
+            if draw < 0.1:
+                row.extend(str(rng.randint(1, 999)))
+                row.append(".")
+            elif draw < 0.14:
+                row.append(rng.choice(SYMBOLS))
+            else:
+                row.append(".")
+        file.write("".join(row[:width]) + "\n")
+
+
+def generate_cards(file: TextIO, scale: int, rng: random.Random) -> None:
+    """
+    Writes 'scale' cards of 10 owned and 25 winning numbers. The matches are kept
+    low on average, so the number of copies does not explode.
+    """
+    id_width = len(str(scale))
+    for id in range(1, scale + 1):
+        numbers = rng.sample(range(1, 100), 35)
+        winning = numbers[:25]
+        matches = 0 if rng.random() < 0.75 else rng.randint(1, 3)
+        owned = numbers[25:25 + 10 - matches] + rng.sample(winning, matches)
+        rng.shuffle(owned)
+        file.write(
+            f"Card {id:>{id_width}}: {' '.join(f'{n:>2}' for n in owned)}"
+            f" | {' '.join(f'{n:>2}' for n in winning)}\n"
+        )
+
+
+def generate_almanac(file: TextIO, scale: int, rng: random.Random) -> None:
+    """
+    Writes an almanac with 'scale' seed pairs and seven maps of about
+    'scale' ranges each, with non-overlapping sources below 2**32.
+    Part 1 reads the same seeds line as 2 * 'scale' seeds.
+    """
+    upper = 2 ** 32
+    seeds = []
+    for _ in range(scale):
+        start = rng.randrange(upper)
+        seeds.extend((start, rng.randint(1, min(10 ** 6, upper - start))))
+    file.write(f"seeds: {' '.join(map(str, seeds))}\n")
+
+    n_ranges = max(2, scale)
+    for source, destination in zip(MAP_NAMES, MAP_NAMES[1:]):
+        file.write(f"\n{source}-to-{destination} map:\n")
+        bounds = sorted(rng.sample(range(1, upper), n_ranges - 1))
+        for src_start, src_end in zip([0] + bounds, bounds + [upper]):
+            # leave some gaps, which map every key to itself
+            if rng.random() < 0.2:
+                continue
+            length = src_end - src_start
+            file.write(f"{rng.randrange(upper - length + 1)} {src_start} {length}\n")
+
+
+GENERATORS: Dict[int, Callable[[TextIO, int, random.Random], None]] = {
+    1: generate_calibration,
+    2: generate_games,
+    3: generate_schematic,
+    4: generate_cards,
+    5: generate_almanac,
+}
+
+
+def generate_input(day: int, scale: int, file_path: str, seed: int = 0) -> None:
+    with open(file_path, "w") as file:
+        GENERATORS[day](file, scale, random.Random(seed))
@@ -0,0 +1,249 @@
+"""
+Benchmark harness timing the parse and solve phases of every implementation
+variant of the solutions on synthetic inputs of configurable scale.
+
+Example:
+    python -m benchmarks.run --days 4 5 --scales 1000 100000 --output results.json
+    python -m benchmarks.run --days 4 --scales 1000 --compare results.json
+"""
+from __future__ import annotations
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from dataclasses import dataclass
+import importlib
+import json
+import multiprocessing
+import os
+from pathlib import Path
+import resource
+import sys
+import tempfile
+import time
+from types import ModuleType
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from benchmarks.generators import generate_input
+from utils.solutions import discover_solutions, load_solution
+
+
+@dataclass
+class Variant:
+    """
+    An implementation variant of a solution, split into a parse and a solve phase.
+
+    Attributes:
+        day (int): The day of the solution.
+        part (int): The part of the solution.
+        name (str): The name of the variant.
+        parse (Callable): Builds the parsed input from the solution module and the input path.
+        solve (Callable): Computes the answer from the solution module and the parsed input.
+        max_scale (int): The largest scale the variant is run at, if limited.
+        imports (Tuple[str, ...]): The heavy modules the variant imports lazily, timed apart from its phases.
+    """
+
+    day: int
+    part: int
+    name: str
+    parse: Callable[[ModuleType, str], Any]
+    solve: Callable[[ModuleType, Any], int]
+    max_scale: Optional[int] = None
+    imports: Tuple[str, ...] = ()
+
+
+def read_lines(module: ModuleType, file_path: str) -> List[str]:
+    with open(file_path) as file:
+        return file.read().splitlines()
+
+
+def read_text(file_path: str) -> str:
+    with open(file_path) as file:
+        return file.read()
+
+
+def no_parse(module: ModuleType, file_path: str) -> str:
+    return file_path
+
+
+def bag(module: ModuleType) -> Any:
+    return module.Bag(red=12, green=13, blue=14)
+
+
+def sum_streamed_part_numbers(module: ModuleType, file_path: str) -> int:
+    with open(file_path) as file:
+        return sum(n.value for n in module.StreamingEngine(file).iter_part_numbers())
+
+
+def sum_streamed_gear_ratios(module: ModuleType, file_path: str) -> int:
+    with open(file_path) as file:
+        return sum(g.gear_ratio for g in module.StreamingEngine(file).iter_gears())
+
+
+# the streaming variants read the input while solving it, so their parse phase is empty
+VARIANTS: List[Variant] = [
+    Variant(1, 1, "lines", no_parse, lambda m, p: sum(m.get_calibration_values(p))),
+    Variant(1, 1, "mmap", no_parse, lambda m, p: m.sum_calibration_values(p)[0]),
+    Variant(1, 2, "lines", no_parse, lambda m, p: sum(m.get_calibration_values(p))),
+    Variant(1, 2, "mmap", no_parse, lambda m, p: m.sum_calibration_values(p)[0]),
+    Variant(1, 2, "parallel", no_parse, lambda m, p: m.parallel_sum_calibration_values(p)),
+    Variant(2, 1, "objects", no_parse, lambda m, p: sum(g.id for g in m.get_valid_games(p, bag(m)))),
+    Variant(2, 1, "streaming", no_parse, lambda m, p: m.sum_possible_game_ids(p, bag(m))),
+    Variant(
+        2, 1, "index", lambda m, p: m.GameIndex.from_file(p), lambda m, i: int(i.sum_possible_ids([[12, 13, 14]])[0]),
+        imports=("numpy",),
+    ),
+    Variant(2, 2, "objects", lambda m, p: m.get_games(p), lambda m, games: sum(g.power for g in games)),
+    Variant(2, 2, "streaming", no_parse, lambda m, p: m.sum_game_powers(p)),
+    Variant(3, 1, "objects", lambda m, p: m.read_engine(p), lambda m, e: sum(n.value for n in e.get_part_numbers())),
+    Variant(3, 1, "numpy", lambda m, p: m.NumpyEngine(read_text(p)), lambda m, e: sum(n.value for n in e.get_part_numbers()), imports=("numpy",)),
+    Variant(3, 1, "streaming", no_parse, sum_streamed_part_numbers),
+    Variant(3, 2, "objects", lambda m, p: m.read_engine(p), lambda m, e: sum(g.gear_ratio for g in e.get_gears())),
+    Variant(3, 2, "numpy", lambda m, p: m.NumpyEngine(read_text(p)), lambda m, e: sum(g.gear_ratio for g in e.get_gears()), imports=("numpy",)),
+    Variant(3, 2, "streaming", no_parse, sum_streamed_gear_ratios),
+    Variant(4, 1, "cards", lambda m, p: m.read_cards(p), lambda m, cards: sum(c.points for c in cards)),
+    Variant(4, 1, "deck", lambda m, p: m.read_deck(p), lambda m, deck: int(deck.points.sum()), imports=("numpy",)),
+    Variant(4, 2, "cards", lambda m, p: m.read_cards(p), lambda m, cards: sum(m.count_copies(cards))),
+    Variant(
+        4, 2, "deck", lambda m, p: m.read_deck(p), lambda m, deck: int(m.count_deck_copies(deck).sum()),
+        imports=("numpy",),
+    ),
+    Variant(4, 2, "materialised", lambda m, p: m.read_cards(p), lambda m, cards: len(m.process_copies(cards)), max_scale=10 ** 4),
+    Variant(
+        5, 1, "bisect", lambda m, p: m.read_almanac(read_lines(m, p)),
+        lambda m, a: min(s.location for s in m.process_seeds(*a, vectorize=False)),
+    ),
+    Variant(
+        5, 1, "arrays", lambda m, p: m.read_almanac(read_lines(m, p)),
+        lambda m, a: min(s.location for s in m.process_seeds(*a, vectorize=True)),
+        imports=("numpy",),
+    ),
+    Variant(5, 2, "ranges", lambda m, p: m.read_almanac(read_lines(m, p)), lambda m, a: min(s.location for s in m.process_seed_ranges(*a))),
+    Variant(
+        5, 2, "chunked", read_lines,
+        lambda m, lines: min(s.location for s in m.not_efficient_process_almanac(lines)),
+        max_scale=10,
+        imports=("numpy", "tqdm"),
+    ),
+    Variant(
+        5, 2, "parallel", read_lines,
+        lambda m, lines: min(s.location for s in m.not_efficient_process_almanac(lines, workers=os.cpu_count())),
+        max_scale=10,
+        imports=("numpy", "tqdm"),
+    ),
+]
+
+
+def peak_rss_kb() -> int:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def run_case(day: int, part: int, name: str, scale: int, file_path: str) -> Dict[str, Any]:
+    """
+    Runs a variant on an input, meant to be called in a fresh process so that
+    the peak RSS only accounts for this variant.
+    """
+    variant = next(v for v in VARIANTS if (v.day, v.part, v.name) == (day, part, name))
+    module = load_solution(day, part)
+    baseline_rss = peak_rss_kb()
+
+    # the solutions import their heavy dependencies on first use, keep that out of the phases
+    imported_at = time.perf_counter()
+    for dependency in variant.imports:
+        importlib.import_module(dependency)
+    import_seconds = time.perf_counter() - imported_at
+
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        start = time.perf_counter()
+        parsed = variant.parse(module, file_path)
+        parsed_at = time.perf_counter()
+        answer = variant.solve(module, parsed)
+        solved_at = time.perf_counter()
+
+    total = solved_at - start
+    return {
+        "day": day,
+        "part": part,
+        "variant": name,
+        "scale": scale,
+        "import_seconds": import_seconds,
+        "parse_seconds": parsed_at - start,
+        "solve_seconds": solved_at - parsed_at,
+        "throughput": scale / total if total > 0 else None,
+        "peak_rss_kb": peak_rss_kb(),
+        "rss_increase_kb": peak_rss_kb() - baseline_rss,
+        "answer": answer,
+    }
+
+
+def run_benchmarks(days: List[int], scales: List[int], variants: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    parts = discover_solutions()
+    # a fresh spawned process for every case keeps the peak RSS of the cases apart
+    context = multiprocessing.get_context("spawn")
+    results = []
+    with tempfile.TemporaryDirectory() as directory, ProcessPoolExecutor(
+        max_workers=1, mp_context=context, max_tasks_per_child=1
+    ) as executor:
+        for day in days:
+            for scale in scales:
+                file_path = str(Path(directory) / f"day-{day:02d}-{scale}.txt")
+                generate_input(day, scale, file_path)
+                for variant in VARIANTS:
+                    if (
+                        variant.day != day
+                        or (variant.day, variant.part) not in parts
+                        or (variants and variant.name not in variants)
+                        or (variant.max_scale is not None and scale > variant.max_scale)
+                    ):
+                        continue
+                    result = executor.submit(run_case, day, variant.part, variant.name, scale, file_path).result()
+                    print_result(result)
+                    results.append(result)
+    return results
+
+
+def print_result(result: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> None:
+    line = (
+        f"day {result['day']:>2} part {result['part']} {result['variant']:<12} scale {result['scale']:>10}"
+        f"  import {result.get('import_seconds', 0.0):7.4f}s"
+        f"  parse {result['parse_seconds']:9.4f}s  solve {result['solve_seconds']:9.4f}s"
+        f"  {result['throughput'] or 0:14.0f}/s  rss {result['peak_rss_kb'] / 1024:8.1f}MB"
+        f"  answer {result['answer']}"
+    )
+    if baseline is not None:
+        previous = baseline["parse_seconds"] + baseline["solve_seconds"]
+        current = result["parse_seconds"] + result["solve_seconds"]
+        line += f"  {current / previous if previous else float('inf'):.2f}x of baseline"
+    print(line, flush=True)
+
+
+def compare(results: List[Dict[str, Any]], baseline_path: str) -> None:
+    with open(baseline_path) as file:
+        baseline = {
+            (r["day"], r["part"], r["variant"], r["scale"]): r for r in json.load(file)
+        }
+    print(f"\nComparison with {baseline_path}:")
+    for result in results:
+        previous = baseline.get((result["day"], result["part"], result["variant"], result["scale"]))
+        if previous is not None:
+            print_result(result, previous)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, nargs="+", default=sorted({day for day, _ in discover_solutions()}))
+    parser.add_argument("--scales", type=int, nargs="+", default=[10 ** 3, 10 ** 4, 10 ** 5])
+    parser.add_argument("--variants", nargs="+", help="only run the variants with these names")
+    parser.add_argument("--output", help="JSON file where the results are stored")
+    parser.add_argument("--compare", help="JSON file of previous results to compare with")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.days, args.scales, args.variants)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -1,4 +1,13 @@
-from typing import List
+from array import array
+import mmap
+import os
+from typing import List, Optional, Tuple
+
+
+VERBOSE = bool(os.environ.get("AOC_VERBOSE"))
+
+NON_DIGITS = bytes(c for c in range(256) if not ord("0") <= c <= ord("9"))
+
 
 def get_first_digit(text: str) -> str:
     for char in text:
@@ -16,9 +25,37 @@ def get_calibration_values(file_path: str) -> List[int]:
             calibration_values.append(value)
     return calibration_values
 
+def sum_calibration_values(file_path: str, keep_values: bool = False) -> Tuple[int, Optional[array]]:
+    """
+    Memory-maps the file and sums the calibration values scanning it as bytes,
+    so the memory does not grow with the size of the file.
+    With 'keep_values' the value of each line is also returned in a compact array('H').
+    """
+    total = 0
+    values = array("H") if keep_values else None
+    if os.path.getsize(file_path) == 0:
+        return total, values
+
+    with open(file_path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        for line in iter(data.readline, b""):
+            digits = line.translate(None, NON_DIGITS)
+            if not digits:
+                raise ValueError("String not containing digits")
+            value = int(digits[:1] + digits[-1:])
+            total += value
+            if values is not None:
+                values.append(value)
+    return total, values
+
+def solve(input_path: str) -> int:
+    """
+    Returns the answer of the puzzle for the given input file.
+    """
+    return sum_calibration_values(input_path)[0]
+
 if __name__ == "__main__":
     input_path = "../input.txt"
-    values = get_calibration_values(input_path) 
-    sum_values = sum(values)
-    print(f"Calibration values:\n{values}")
-    print(f"\nSum: {sum_values}")
\ No newline at end of file
+    sum_values, values = sum_calibration_values(input_path, keep_values=VERBOSE)
+    if VERBOSE:
+        print(f"Calibration values:\n{values.tolist()}\n")
+    print(f"Sum: {sum_values}")
\ No newline at end of file
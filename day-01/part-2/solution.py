@@ -1,38 +1,88 @@
-from typing import List
-import numpy as np
-
-
-def get_first_last_digits(line: str) -> str:
-    word_digits = {
-        "zero": "0",
-        "one": "1",
-        "two": "2",
-        "three": "3",
-        "four": "4",
-        "five": "5",
-        "six": "6",
-        "seven": "7",
-        "eight": "8",
-        "nine": "9"
-    }
-    digit_word = {value: key for key, value in word_digits.items()}
-    
-    # substitute digit with word digits
-    for char in line:
-        if char.isdigit():
-            line = line.replace(char, digit_word[char])
-    
-    # first word digit
-    word_digit_idx = [line.find(word) for word in word_digits.keys()]
-    word_digit_idx = np.array([idx if idx >=0 else np.nan for idx in word_digit_idx])
-    first_word_digit = int(np.nanargmin(word_digit_idx))
-
-    # last word digit
-    word_digit_idx = [line.rfind(word) for word in word_digits.keys()]
-    word_digit_idx = np.array([idx if idx >=0 else np.nan for idx in word_digit_idx])
-    last_word_digit = int(np.nanargmax(word_digit_idx))
-    
-    return int(f"{first_word_digit}{last_word_digit}")
+from array import array
+from itertools import repeat
+import mmap
+import os
+from typing import Dict, List, Optional, Tuple
+
+
+VERBOSE = bool(os.environ.get("AOC_VERBOSE"))
+
+WORD_DIGITS = {
+    "zero": "0",
+    "one": "1",
+    "two": "2",
+    "three": "3",
+    "four": "4",
+    "five": "5",
+    "six": "6",
+    "seven": "7",
+    "eight": "8",
+    "nine": "9"
+}
+DIGITS = {digit: digit for digit in WORD_DIGITS.values()}
+
+
+class DigitScanner:
+    """
+    Trie over the spelled and the plain digits, built once and used to find the
+    first and the last digit of a line without rewriting it. It works either on
+    str lines or, when built from bytes patterns, on bytes lines.
+    Overlapping words like "eightwo" are handled since each start position is matched on its own.
+    """
+
+    END = ""  # key of the trie nodes where a digit ends
+
+    def __init__(self, patterns: Dict[str, str]) -> None:
+        """
+        Builds the trie from a mapping of every spelled or plain digit to the digit it stands for.
+        """
+        self.trie: Dict[str, dict] = {}
+        for pattern, digit in patterns.items():
+            node = self.trie
+            for char in pattern:
+                node = node.setdefault(char, {})
+            node[self.END] = digit
+
+    def match(self, line: str, start: int) -> Optional[str]:
+        """
+        Returns the digit spelled (or written) at the start position of the line, if any.
+        """
+        node = self.trie
+        for i in range(start, len(line)):
+            node = node.get(line[i])
+            if node is None:
+                return None
+            if self.END in node:
+                return node[self.END]
+        return None
+
+    def first(self, line: str) -> str:
+        for start in range(len(line)):
+            digit = self.match(line, start)
+            if digit is not None:
+                return digit
+        raise ValueError("String not containing digits")
+
+    def last(self, line: str) -> str:
+        for start in range(len(line) - 1, -1, -1):
+            digit = self.match(line, start)
+            if digit is not None:
+                return digit
+        raise ValueError("String not containing digits")
+
+
+def encode_patterns(patterns: Dict[str, str]) -> Dict[bytes, bytes]:
+    return {pattern.encode(): digit.encode() for pattern, digit in patterns.items()}
+
+
+scanner = DigitScanner({**WORD_DIGITS, **DIGITS})
+bytes_scanner = DigitScanner(encode_patterns({**WORD_DIGITS, **DIGITS}))
+# plain digits only, i.e. the semantics of part 1
+bytes_digit_scanner = DigitScanner(encode_patterns(DIGITS))
+
+
+def get_first_last_digits(line: str) -> int:
+    return int(scanner.first(line) + scanner.last(line))
         
 
 def get_calibration_values(file_path: str) -> List[int]:
@@ -43,9 +93,85 @@ def get_calibration_values(file_path: str) -> List[int]:
             calibration_values.append(value)
     return calibration_values
 
+def sum_calibration_chunk(
+    file_path: str,
+    start: int,
+    end: int,
+    spelled_words: bool = True,
+    values: Optional[array] = None,
+) -> int:
+    """
+    Memory-maps the file and sums the calibration values of the lines starting in
+    the byte range [start, end), scanning them as bytes.
+    Spelled digits are only recognised with 'spelled_words' (part 2), otherwise
+    only plain digits are (part 1). The value of each line is appended to 'values' if given.
+    """
+    if start >= end:
+        return 0
+
+    line_scanner = bytes_scanner if spelled_words else bytes_digit_scanner
+    total = 0
+    with open(file_path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        data.seek(start)
+        while data.tell() < end:
+            line = data.readline()
+            value = int(line_scanner.first(line) + line_scanner.last(line))
+            total += value
+            if values is not None:
+                values.append(value)
+    return total
+
+def sum_calibration_values(file_path: str, keep_values: bool = False) -> Tuple[int, Optional[array]]:
+    """
+    Sums the calibration values of a memory-mapped file, so the memory does not grow with its size.
+    With 'keep_values' the value of each line is also returned in a compact array('H').
+    """
+    values = array("H") if keep_values else None
+    total = sum_calibration_chunk(file_path, 0, os.path.getsize(file_path), values=values)
+    return total, values
+
+def split_lines(file_path: str, n_chunks: int) -> List[int]:
+    """
+    Returns the bounds of 'n_chunks' byte ranges of the file aligned to the start of a line.
+    """
+    size = os.path.getsize(file_path)
+    bounds = [0]
+    with open(file_path, "rb") as file:
+        for i in range(1, n_chunks):
+            file.seek(max(size * i // n_chunks, bounds[-1]))
+            file.readline()  # move to the start of the next line
+            bounds.append(min(file.tell(), size))
+    bounds.append(size)
+    return bounds
+
+def parallel_sum_calibration_values(file_path: str, workers: Optional[int] = None, spelled_words: bool = True) -> int:
+    """
+    Splits the file into line-aligned byte ranges, sums each of them in a pool of
+    processes and reduces the partial sums. The result does not depend on 'workers'.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = workers or os.cpu_count()
+    bounds = split_lines(file_path, workers)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        partial_sums = executor.map(
+            sum_calibration_chunk,
+            repeat(file_path),
+            bounds[:-1],
+            bounds[1:],
+            repeat(spelled_words),
+        )
+        return sum(partial_sums)
+
+def solve(input_path: str) -> int:
+    """
+    Returns the answer of the puzzle for the given input file.
+    """
+    return sum_calibration_values(input_path)[0]
+
 if __name__ == "__main__":
     input_path = "../input.txt"
-    values = get_calibration_values(input_path) 
-    sum_values = sum(values)
-    print(f"Calibration values:\n{values}")
-    print(f"\nSum: {sum_values}")
\ No newline at end of file
+    sum_values, values = sum_calibration_values(input_path, keep_values=VERBOSE)
+    if VERBOSE:
+        print(f"Calibration values:\n{values.tolist()}\n")
+    print(f"Sum: {sum_values}")
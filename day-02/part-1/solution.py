@@ -1,14 +1,24 @@
+from __future__ import annotations
+from array import array
 from dataclasses import dataclass
-from typing import List
+import os
+from typing import TYPE_CHECKING, Iterable, List, Optional, Tuple
 import re
+import sys
+from pathlib import Path
 
-@dataclass
+if TYPE_CHECKING:
+    import numpy as np
+
+VERBOSE = bool(os.environ.get("AOC_VERBOSE"))
+
+@dataclass(slots=True)
 class Bag:
     red: int
     blue: int
     green: int
 
-@dataclass
+@dataclass(slots=True)
 class Set:
     red: int = 0
     blue: int = 0
@@ -21,15 +31,39 @@ class Set:
             return True
 
 class Game:
+    """
+    Game whose sets are packed as consecutive (red, green, blue) triples in an array('I').
+    Cube counts that do not fit in it turn the draws into a plain list of ints.
+    """
+
+    __slots__ = ("id", "draws")
+
     def __init__(self, id: int) -> None:
         self.id = id
-        self.sets: List[Set] = []
+        self.draws = array("I")
+        
+    @property
+    def sets(self) -> List[Set]:
+        return [
+            Set(red=red, green=green, blue=blue)
+            for red, green, blue in zip(self.draws[0::3], self.draws[1::3], self.draws[2::3])
+        ]
         
     def add_set_game(self, set_game: Set):
-        self.sets.append(set_game)
+        draw = (set_game.red, set_game.green, set_game.blue)
+        size = len(self.draws)
+        try:
+            self.draws.extend(draw)
+        except OverflowError:
+            # the array keeps the counts appended before the one that did not fit
+            self.draws = list(self.draws[:size]) + list(draw)
     
     def is_possible(self, bag: Bag) -> bool:
-        return all([game_set.is_possible(bag) for game_set in self.sets])
+        return (
+            max(self.draws[0::3], default=0) <= bag.red
+            and max(self.draws[1::3], default=0) <= bag.green
+            and max(self.draws[2::3], default=0) <= bag.blue
+        )
     
     def __str__(self) -> str:
         sets_str = "; ".join(f"{s.red} red, {s.blue} blue, {s.green} green" for s in self.sets)
@@ -55,6 +89,23 @@ def read_game(line: str) -> Game:
     except Exception as e:
         raise ValueError("Incorrect format of the game line") from e
 
+def read_game_maxima(line: str) -> Tuple[int, int, int, int]:
+    """
+    Reduces a game line directly to its id and the maximum amount of red, green
+    and blue cubes drawn, without building the Game and its sets.
+    """
+    try:
+        header, draws = line.split(":")
+        _, id = header.split()
+        maxima = {"red": 0, "green": 0, "blue": 0}
+        for cube in draws.replace(";", ",").split(","):
+            quantity, color = cube.split()
+            maxima[color] = max(maxima[color], int(quantity))
+        return int(id), maxima["red"], maxima["green"], maxima["blue"]
+
+    except Exception as e:
+        raise ValueError("Incorrect format of the game line") from e
+
 def get_valid_games(file_path: str, bag: Bag) -> List[Game]:
     valid_games = []
     with open(file_path, 'r') as file:
@@ -64,10 +115,109 @@ def get_valid_games(file_path: str, bag: Bag) -> List[Game]:
                 valid_games.append(game)
     return valid_games
 
+def sum_possible_ids(games: Iterable[Tuple[int, int, int, int]], bag: Bag) -> int:
+    """
+    Sums the ids of the games, given as their (id, red, green, blue) maxima, possible with the bag.
+    """
+    return sum(
+        id for id, red, green, blue in games
+        if red <= bag.red and green <= bag.green and blue <= bag.blue
+    )
+
+def sum_possible_game_ids(file_path: str, bag: Bag) -> int:
+    """
+    Streams the games of the file and sums the ids of the ones possible with the bag.
+    """
+    with open(file_path, 'r') as file:
+        return sum_possible_ids((read_game_maxima(line.strip()) for line in file), bag)
+
+
+class GameIndex:
+    """
+    Index of the minimum bag (the maxima of red, green and blue cubes) of every game,
+    answering for a whole batch of bags the sum of the ids of the games possible with each bag.
+
+    When the cube counts are small enough, the ids are accumulated in a 3-D prefix-sum
+    table over (red, green, blue), so each bag is answered with a single lookup.
+    Otherwise the games are compared with the bags in vectorized chunks.
+
+    Attributes:
+        ids (np.ndarray): The id of each game.
+        minimum_bags (np.ndarray): The (red, green, blue) maxima of each game.
+        table (np.ndarray): The prefix-sum table, if built.
+    """
+
+    MAX_TABLE_CELLS = 10_000_000
+    CHUNK_SIZE = 10_000_000  # games times bags compared at once without the table
+
+    def __init__(self, ids: np.ndarray, minimum_bags: np.ndarray) -> None:
+        self.ids = ids
+        self.minimum_bags = minimum_bags
+        self.table = self.__get_table()
+
+    @classmethod
+    def from_file(cls, file_path: str) -> GameIndex:
+        import numpy as np
+
+        with open(file_path, 'r') as file:
+            games = [read_game_maxima(line.strip()) for line in file]
+        games = np.array(games, dtype=np.int64).reshape(-1, 4)
+        return cls(ids=games[:, 0], minimum_bags=games[:, 1:])
+
+    def __get_table(self) -> Optional[np.ndarray]:
+        import numpy as np
+
+        shape = tuple(int(n) + 1 for n in self.minimum_bags.max(axis=0, initial=0))
+        if np.prod(shape) > self.MAX_TABLE_CELLS:
+            return None
+
+        table = np.zeros(shape, dtype=np.int64)
+        np.add.at(table, tuple(self.minimum_bags.T), self.ids)
+        for axis in range(3):
+            table = np.cumsum(table, axis=axis)
+        return table
+
+    def sum_possible_ids(self, bags: np.ndarray) -> np.ndarray:
+        """
+        Returns, for each bag given as a (red, green, blue) row, the sum of the ids
+        of the games possible with it.
+        """
+        import numpy as np
+
+        bags = np.asarray(bags, dtype=np.int64).reshape(-1, 3)
+        if self.table is not None:
+            # a bag larger than every game counts as large as the table
+            coordinates = np.minimum(bags, np.array(self.table.shape) - 1)
+            sums = self.table[tuple(np.maximum(coordinates, 0).T)]
+            return np.where((bags < 0).any(axis=1), 0, sums)
+
+        sums = np.zeros(len(bags), dtype=np.int64)
+        step = max(1, self.CHUNK_SIZE // max(1, len(self.ids)))
+        for start in range(0, len(bags), step):
+            chunk = bags[start:start + step]
+            possible = (self.minimum_bags[None, :, :] <= chunk[:, None, :]).all(axis=2)
+            sums[start:start + step] = possible @ self.ids
+        return sums
+
+
+def solve(input_path: str) -> int:
+    """
+    Returns the answer of the puzzle for the given input file.
+    """
+    from utils.cache import cached_parse
+    from utils.parsers import parse_games
+
+    return sum_possible_ids(cached_parse(parse_games, input_path), Bag(red=12, green=13, blue=14))
+
+
 if __name__ == "__main__":
+    sys.path.append(str(Path(__file__).resolve().parents[2]))
+    from utils.cache import cached_parse
+    from utils.parsers import parse_games
+
     input_path = "../input.txt"
     bag = Bag(red=12, green=13, blue=14)
-    valid_games = get_valid_games(input_path, bag)
-    sum_ids = sum([game.id for game in valid_games])
-    print(f"Valid games:\n{"\n".join([str(game) for game in valid_games])}")
-    print(f"\nSum ids: {sum_ids}")
+    if VERBOSE:
+        valid_games = get_valid_games(input_path, bag)
+        print("Valid games:\n" + "\n".join(str(game) for game in valid_games) + "\n")
+    print(f"Sum ids: {sum_possible_ids(cached_parse(parse_games, input_path), bag)}")
@@ -1,14 +1,24 @@
+from __future__ import annotations
+from array import array
 from dataclasses import dataclass
-from typing import List
+import os
+from typing import TYPE_CHECKING, AsyncIterable, AsyncIterator, Iterable, List, Optional, Tuple, Union
 import re
+import sys
+from pathlib import Path
 
-@dataclass
+if TYPE_CHECKING:
+    import asyncio
+
+VERBOSE = bool(os.environ.get("AOC_VERBOSE"))
+
+@dataclass(slots=True)
 class Bag:
     red: int
     blue: int
     green: int
 
-@dataclass
+@dataclass(slots=True)
 class Set:
     red: int = 0
     blue: int = 0
@@ -21,21 +31,45 @@ class Set:
             return True
 
 class Game:
+    """
+    Game whose sets are packed as consecutive (red, green, blue) triples in an array('I').
+    Cube counts that do not fit in it turn the draws into a plain list of ints.
+    """
+
+    __slots__ = ("id", "draws", "power")
+
     def __init__(self, id: int) -> None:
         self.id = id
-        self.sets: List[Set] = []
+        self.draws = array("I")
         self.power: int = None
         
+    @property
+    def sets(self) -> List[Set]:
+        return [
+            Set(red=red, green=green, blue=blue)
+            for red, green, blue in zip(self.draws[0::3], self.draws[1::3], self.draws[2::3])
+        ]
+        
     def add_set_game(self, set_game: Set):
-        self.sets.append(set_game)
+        draw = (set_game.red, set_game.green, set_game.blue)
+        size = len(self.draws)
+        try:
+            self.draws.extend(draw)
+        except OverflowError:
+            # the array keeps the counts appended before the one that did not fit
+            self.draws = list(self.draws[:size]) + list(draw)
     
     def is_possible(self, bag: Bag) -> bool:
-        return all([game_set.is_possible(bag) for game_set in self.sets])
+        return (
+            max(self.draws[0::3], default=0) <= bag.red
+            and max(self.draws[1::3], default=0) <= bag.green
+            and max(self.draws[2::3], default=0) <= bag.blue
+        )
     
     def minimum_bag(self) -> Bag:
-        red = max([set_game.red for set_game in self.sets])
-        blue = max([set_game.blue for set_game in self.sets])
-        green = max([set_game.green for set_game in self.sets])
+        red = max(self.draws[0::3])
+        green = max(self.draws[1::3])
+        blue = max(self.draws[2::3])
         return Bag(red=red, blue=blue, green=green)
     
     def compute_power(self) -> int:
@@ -66,6 +100,23 @@ def read_game(line: str) -> Game:
     except Exception as e:
         raise ValueError("Incorrect format of the game line") from e
 
+def read_game_maxima(line: str) -> Tuple[int, int, int, int]:
+    """
+    Reduces a game line directly to its id and the maximum amount of red, green
+    and blue cubes drawn, without building the Game and its sets.
+    """
+    try:
+        header, draws = line.split(":")
+        _, id = header.split()
+        maxima = {"red": 0, "green": 0, "blue": 0}
+        for cube in draws.replace(";", ",").split(","):
+            quantity, color = cube.split()
+            maxima[color] = max(maxima[color], int(quantity))
+        return int(id), maxima["red"], maxima["green"], maxima["blue"]
+
+    except Exception as e:
+        raise ValueError("Incorrect format of the game line") from e
+
 def get_games(file_path: str) -> List[Game]:
     games = []
     with open(file_path, 'r') as file:
@@ -79,9 +130,152 @@ def compute_power_power_games(games: List[Game]) -> None:
     [game.compute_power() for game in games]
         
 
+def sum_powers(games: Iterable[Tuple[int, int, int, int]]) -> int:
+    """
+    Sums the powers of the games, given as their (id, red, green, blue) maxima.
+    """
+    return sum(red * green * blue for _, red, green, blue in games)
+
+def sum_game_powers(file_path: str) -> int:
+    """
+    Streams the games of the file and sums their powers.
+    """
+    with open(file_path, 'r') as file:
+        return sum_powers(read_game_maxima(line.strip()) for line in file)
+
+
+class GameStream:
+    """
+    Running aggregates over game records that keep arriving as an async stream of lines,
+    e.g. from a socket through an 'asyncio.StreamReader'.
+
+    The lines are grouped in batches of 'batch_size' and handed over to a parsing task through
+    a queue of at most 'max_pending' batches: when the parser falls behind, the ingestion stops
+    pulling lines from the stream until there is room again. The aggregates are updated a whole
+    batch at a time, so they can be read consistently at any moment.
+
+    Attributes:
+        bag (Bag): The bag the games are checked against for the sum of the ids.
+        batch_size (int): The number of lines parsed at once.
+        max_pending (int): The number of batches waiting to be parsed before the ingestion pauses.
+        games (int): The number of games ingested so far.
+        sum_ids (int): The sum of the ids of the games possible with the bag so far.
+        sum_powers (int): The sum of the powers of the games so far.
+    """
+
+    def __init__(self, bag: Bag, batch_size: int = 256, max_pending: int = 4) -> None:
+        if batch_size < 1 or max_pending < 1:
+            raise ValueError("The batch size and the pending batches must be at least 1")
+        self.bag = bag
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.games = 0
+        self.sum_ids = 0
+        self.sum_powers = 0
+
+    def snapshot(self) -> Tuple[int, int, int]:
+        """
+        Returns the number of games, the sum of the possible ids and the sum of the powers so far.
+        """
+        return self.games, self.sum_ids, self.sum_powers
+
+    async def ingest(self, lines: AsyncIterable[Union[str, bytes]]) -> Tuple[int, int, int]:
+        """
+        Consumes the stream of lines until it ends, returning the final snapshot.
+        Blank lines are skipped and bytes lines are decoded as UTF-8.
+        """
+        import asyncio
+
+        queue: asyncio.Queue[Optional[List[str]]] = asyncio.Queue(maxsize=self.max_pending)
+        parser = asyncio.create_task(self.__parse_batches(queue))
+        try:
+            batch = []
+            async for line in lines:
+                if isinstance(line, bytes):
+                    line = line.decode()
+                line = line.strip()
+                if not line:
+                    continue
+                batch.append(line)
+                if len(batch) == self.batch_size:
+                    await self.__put(queue, batch, parser)
+                    batch = []
+            if batch:
+                await self.__put(queue, batch, parser)
+            await self.__put(queue, None, parser)
+            await parser
+        finally:
+            parser.cancel()
+        return self.snapshot()
+
+    async def __put(self, queue: asyncio.Queue, batch: Optional[List[str]], parser: asyncio.Task) -> None:
+        """
+        Waits for room in the queue, failing fast if the parser stopped on a malformed line.
+        """
+        import asyncio
+
+        put = asyncio.ensure_future(queue.put(batch))
+        await asyncio.wait([put, parser], return_when=asyncio.FIRST_COMPLETED)
+        if not put.done():
+            put.cancel()
+            parser.result()
+
+    async def __parse_batches(self, queue: asyncio.Queue) -> None:
+        import asyncio
+
+        while True:
+            batch = await queue.get()
+            if batch is None:
+                return
+            self.__parse_batch(batch)
+            # let the ingestion and the readers of the aggregates run between batches
+            await asyncio.sleep(0)
+
+    def __parse_batch(self, batch: List[str]) -> None:
+        sum_ids = 0
+        sum_powers = 0
+        for line in batch:
+            game = read_game(line)
+            game.compute_power()
+            if game.is_possible(self.bag):
+                sum_ids += game.id
+            sum_powers += game.power
+        # a malformed line raises before any game of its batch is counted
+        self.games += len(batch)
+        self.sum_ids += sum_ids
+        self.sum_powers += sum_powers
+
+
+async def stream_lines(file_path: str, delay: float = 0.0) -> AsyncIterator[str]:
+    """
+    Local producer of game records for GameStream, yielding the lines of the file
+    one at a time, with an optional delay in seconds between them.
+    """
+    import asyncio
+
+    with open(file_path, 'r') as file:
+        for line in file:
+            yield line
+            await asyncio.sleep(delay)
+
+
+def solve(input_path: str) -> int:
+    """
+    Returns the answer of the puzzle for the given input file.
+    """
+    from utils.cache import cached_parse
+    from utils.parsers import parse_games
+
+    return sum_powers(cached_parse(parse_games, input_path))
+
+
 if __name__ == "__main__":
+    sys.path.append(str(Path(__file__).resolve().parents[2]))
+    from utils.cache import cached_parse
+    from utils.parsers import parse_games
+
     input_path = "../input.txt"
-    games = get_games(input_path)
-    sum_power = sum([game.power for game in games])
-    print(f"Power games:\n{"\n".join([str(game) for game in games])}")
-    print(f"\nSum powers: {sum_power}")
+    if VERBOSE:
+        games = get_games(input_path)
+        print("Power games:\n" + "\n".join(str(game) for game in games) + "\n")
+    print(f"Sum powers: {sum_powers(cached_parse(parse_games, input_path))}")
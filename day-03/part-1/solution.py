@@ -1,8 +1,16 @@
 from __future__ import annotations
 from abc import ABC
 from dataclasses import dataclass
+import os
 import re
-from typing import List, Tuple
+import sys
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Optional, Set, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+VERBOSE = bool(os.environ.get("AOC_VERBOSE"))
 
 
 @dataclass
@@ -21,25 +29,6 @@ class Element(ABC):
     y: int
 
 
-class Symbol(Element):
-    """
-    Represents a symbol with a value and coordinates (x, y).
-    """
-
-    pass
-
-
-class Period(Element):
-    """
-    Represents a period with a value and coordinates (x, y).
-    """
-
-    value: str = "."
-
-    def __init__(self, x: int, y: int) -> None:
-        super().__init__(self.value, x, y)
-
-
 class Number(Element):
     """
     Represents a number with a value, x-axis coordinates, and y-coordinate.
@@ -55,57 +44,233 @@ class Number(Element):
         self.x = x
         self.y = y
 
-    def is_part_number(self, matrix: List[List[Element]]) -> bool:
+    def neighbor_coordinates(self) -> Iterator[Tuple[int, int]]:
         """
-        Checks if the neighboring elements in the matrix are symbols.
+        Yields the (x, y) coordinates of the cells surrounding the number.
         """
-        rows, cols = len(matrix), len(matrix[0])
-
-        for i in range(max(0, self.y - 1), min(rows, self.y + 2)):
-            for j in range(max(0, self.x[0] - 1), min(cols, self.x[1] + 2)):
-                if (self.x[0] <= j <= self.x[1]) and (self.y == i):
-                    continue  # Skip the cells that are part of the number itself
+        for i in range(self.y - 1, self.y + 2):
+            for j in range(self.x[0] - 1, self.x[1] + 2):
+                yield j, i
 
-                # Check if the neighboring element is a symbol
-                if isinstance(matrix[i][j], Symbol):
-                    return True
-        return False
+    def is_part_number(self, symbols: Set[Tuple[int, int]]) -> bool:
+        """
+        Checks if any of the neighboring coordinates is in the index of symbols.
+        """
+        # the cells of the number itself are digits, so they are never in the index
+        return any(coordinates in symbols for coordinates in self.neighbor_coordinates())
 
 
 class Engine:
+    # the numbers of an engine built from the parsed elements instead of the schema
+    numbers: Optional[List[Number]] = None
+
     def __init__(self, schema: str):
         self.schema = schema
-        self.matrix = self.__get_symbol_matrix()
-
-    def __get_symbol_matrix(self) -> List[Symbol]:
-        matrix = [
-            [
-                Symbol(char, x, y) if re.match(r"[^\w\d\n.]", char) else Period(x, y)
-                for x, char in enumerate(line)
-            ]
+        self.symbols = self.__get_symbol_index()
+
+    @classmethod
+    def from_elements(cls, numbers: List[Tuple[int, int, int, int]], symbols: List[Tuple[int, int, str]]) -> Engine:
+        """
+        Builds the engine from the (value, first x, last x, y) numbers and the
+        (x, y, character) symbols of the schema, e.g. parsed by 'parse_schema'.
+        """
+        engine = cls.__new__(cls)
+        engine.schema = None
+        engine.numbers = [Number(value, (start, end), y) for value, start, end, y in numbers]
+        engine.symbols = {(x, y) for x, y, _ in symbols}
+        return engine
+
+    def __get_symbol_index(self) -> Set[Tuple[int, int]]:
+        """
+        Collects the (x, y) coordinates of every symbol of the schema in one pass.
+        """
+        return {
+            (match.start(0), y)
+            for y, line in enumerate(self.schema.splitlines())
+            for match in re.finditer(r"[^\w\d\n.]", line)
+        }
+
+    def get_numbers(self) -> List[Number]:
+        if self.numbers is not None:
+            return list(self.numbers)
+        return [
+            Number(int(match.group(0)), (match.start(0), match.end(0)-1), y)
             for y, line in enumerate(self.schema.splitlines())
+            for match in re.finditer(r"(\d+)", line)
         ]
-        return matrix
 
     def get_part_numbers(self) -> List[Number]:
+        return list(filter(lambda x: x.is_part_number(self.symbols), self.get_numbers()))
+
+class NumpyEngine(Engine):
+    """
+    Engine backend that works on the schema as a uint8 grid with vectorized passes.
+
+    Attributes:
+        grid (np.ndarray): The characters of the schema, padded with periods on the right.
+        mask (np.ndarray): The cells that have a symbol in their 3x3 neighbourhood.
+    """
+
+    def __init__(self, schema: str):
+        self.schema = schema
+        self.grid = self.__get_grid()
+        self.mask = self.__get_neighbour_mask()
+
+    def __get_grid(self) -> np.ndarray:
+        import numpy as np
+
+        lines = self.schema.splitlines()
+        width = max((len(line) for line in lines), default=0)
+        # one extra column of periods keeps the digit runs of two rows apart
+        padded = "".join(line.ljust(width + 1, ".") for line in lines)
+        if not padded.isascii():
+            padded = "".join(char if char.isascii() else self.__to_ascii(char) for char in padded)
+        return np.frombuffer(padded.encode("ascii"), dtype=np.uint8).reshape(len(lines), width + 1)
+
+    @staticmethod
+    def __to_ascii(char: str) -> str:
+        """
+        Replaces a non-ASCII character with an ASCII one of the same class for the
+        regular expressions of Engine: a digit, a word character or a symbol.
+        """
+        if re.fullmatch(r"\d", char):
+            return str(int(char))
+        return "a" if re.fullmatch(r"\w", char) else "#"
+
+    def __get_neighbour_mask(self) -> np.ndarray:
+        """
+        Computes the symbol mask of the grid and dilates it with a 3x3 neighbourhood.
+        """
+        import numpy as np
+
+        grid = self.grid
+        word = (
+            ((grid >= ord("0")) & (grid <= ord("9")))
+            | ((grid >= ord("a")) & (grid <= ord("z")))
+            | ((grid >= ord("A")) & (grid <= ord("Z")))
+            | (grid == ord("_"))
+        )
+        symbols = np.pad(~word & (grid != ord(".")), 1)
+
+        rows, cols = grid.shape
+        mask = np.zeros(grid.shape, dtype=bool)
+        for dy in range(3):
+            for dx in range(3):
+                mask |= symbols[dy:dy + rows, dx:dx + cols]
+        return mask
+
+    def get_part_numbers(self) -> List[Number]:
+        import numpy as np
+
+        digits = ((self.grid >= ord("0")) & (self.grid <= ord("9"))).ravel()
+        touching = np.concatenate(([0], np.cumsum(digits & self.mask.ravel())))
+
+        # label the digit runs by the positions where a run starts and ends
+        edges = np.diff(digits.astype(np.int8), prepend=0, append=0)
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+        is_part = touching[ends] > touching[starts]
+
+        width = self.grid.shape[1]
+        cells = self.grid.tobytes()
+        return [
+            Number(int(cells[start:end]), (start % width, (end - 1) % width), start // width)
+            for start, end in zip(starts[is_part].tolist(), ends[is_part].tolist())
+        ]
+
+
+@dataclass
+class Row:
+    """
+    Represents a parsed row of the schema.
+
+    Attributes:
+        numbers (List[Number]): The numbers of the row.
+        symbols (Set[Tuple[int, int]]): The (x, y) coordinates of the symbols of the row.
+    """
+
+    numbers: List[Number]
+    symbols: Set[Tuple[int, int]]
+
+
+class StreamingEngine:
+    """
+    Engine that reads the schema line by line (e.g. from an open file), keeping
+    only a window of three rows in memory and emitting the results of a row as
+    soon as the row below it has been read. A second pass over an iterator
+    of lines (e.g. an open file) raises a ValueError.
+    """
+
+    def __init__(self, lines: Iterable[str]):
+        self.lines = lines
+        self.consumed = False
+
+    def __read_row(self, line: str, y: int) -> Row:
         numbers = [
             Number(int(match.group(0)), (match.start(0), match.end(0)-1), y)
-            for y, line in enumerate(self.schema.splitlines())
             for match in re.finditer(r"(\d+)", line)
         ]
-        return list(filter(lambda x: x.is_part_number(self.matrix), numbers))
+        symbols = set()
+        for match in re.finditer(r"[^\w\d\n.]", line):
+            symbols.add((match.start(0), y))
+        return Row(numbers, symbols)
 
+    def __get_windows(self) -> Iterator[Tuple[Optional[Row], Row, Optional[Row]]]:
+        """
+        Yields every row together with the rows above and below it, if any.
+        """
+        if self.consumed:
+            raise ValueError("The lines of the schema were already read, they can be streamed only once")
+        # an iterator (e.g. an open file) is exhausted by the pass, a list can be read again
+        self.consumed = iter(self.lines) is self.lines
+        previous, current = None, None
+        for y, line in enumerate(self.lines):
+            row = self.__read_row(line.rstrip("\r\n"), y)
+            if current is not None:
+                yield previous, current, row
+            previous, current = current, row
+        if current is not None:
+            yield previous, current, None
 
-if __name__ == "__main__":
-    file_path = "../input.txt"
+    def iter_part_numbers(self) -> Iterator[Number]:
+        for window in self.__get_windows():
+            symbols = set().union(*(row.symbols for row in window if row is not None))
+            for number in window[1].numbers:
+                if number.is_part_number(symbols):
+                    yield number
+
+    def get_part_numbers(self) -> List[Number]:
+        return list(self.iter_part_numbers())
+
+
+def read_engine(file_path: str) -> Engine:
     with open(file_path) as file:
-        engine_schema = file.read()
+        return Engine(file.read())
+
 
-    engine = Engine(engine_schema)
+def solve(input_path: str) -> int:
+    """
+    Returns the answer of the puzzle for the given input file.
+    """
+    from utils.cache import cached_parse
+    from utils.parsers import parse_schema
+
+    engine = Engine.from_elements(*cached_parse(parse_schema, input_path))
+    return sum(n.value for n in engine.get_part_numbers())
+
+
+if __name__ == "__main__":
+    sys.path.append(str(Path(__file__).resolve().parents[2]))
+    from utils.cache import cached_parse
+    from utils.parsers import parse_schema
+
+    file_path = "../input.txt"
+    engine = Engine.from_elements(*cached_parse(parse_schema, file_path))
     part_numbers = engine.get_part_numbers()
     
     part_numbers = [n.value for n in part_numbers]
     sum_part_numbers = sum(part_numbers)
-    
-    print(f"Part numbers: {part_numbers}")
-    print(f"Sum part numbers: {sum_part_numbers}")
+
+    if VERBOSE:
+        print(f"Part numbers: {part_numbers}")
+    print(f"Sum part numbers: {sum_part_numbers} ({len(part_numbers)} part numbers)")
@@ -1,9 +1,16 @@
 from __future__ import annotations
 from abc import ABC
 from dataclasses import dataclass
+import os
 import re
-from typing import List, Tuple
-from functools import reduce
+import sys
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+VERBOSE = bool(os.environ.get("AOC_VERBOSE"))
 
 
 @dataclass
@@ -29,41 +36,6 @@ class Symbol(Element):
 
     pass
 
-    def is_neighbor(self, other: Number) -> bool:
-        """
-        Checks if the given number is a neighbor of the current symbol based on x and y coordinates.
-        """
-        return (
-            min(abs(self.x - other.x[0]), abs(self.x - other.x[1])) <= 1 and
-            abs(self.y - other.y) <= 1 
-        )
-
-
-    def check_gear(self,  numbers: List[Number]) -> bool:
-        """
-        Checks if there are two neighboring elements in the matrix that are are part numbers.
-        """
-        neighbours = []
-        for number in numbers:
-            if self.is_neighbor(number):
-                neighbours.append(number)
-        if len(neighbours) == 2:
-            self.gear_ratio = reduce(lambda x, y: x.value * y.value, neighbours)
-            return True
-        else:
-            return False
-
-
-class Period(Element):
-    """
-    Represents a period with a value and coordinates (x, y).
-    """
-
-    value: str = "."
-
-    def __init__(self, x: int, y: int) -> None:
-        super().__init__(self.value, x, y)
-
 
 class Number(Element):
     """
@@ -81,72 +53,309 @@ class Number(Element):
         self.y = y
     
 
-    def is_part_number(self, matrix: List[List[Element]]) -> bool:
+    def neighbor_coordinates(self) -> Iterator[Tuple[int, int]]:
         """
-        Checks if the neighboring elements in the matrix are symbols.
+        Yields the (x, y) coordinates of the cells surrounding the number.
         """
-        rows, cols = len(matrix), len(matrix[0])
+        for i in range(self.y - 1, self.y + 2):
+            for j in range(self.x[0] - 1, self.x[1] + 2):
+                yield j, i
 
-        for i in range(max(0, self.y - 1), min(rows, self.y + 2)):
-            for j in range(max(0, self.x[0] - 1), min(cols, self.x[1] + 2)):
-                if (self.x[0] <= j <= self.x[1]) and (self.y == i):
-                    continue  # Skip the cells that are part of the number itself
-
-                # Check if the neighboring element is a symbol
-                if isinstance(matrix[i][j], Symbol):
-                    return True
-        return False
+    def is_part_number(self, symbols: Set[Tuple[int, int]]) -> bool:
+        """
+        Checks if any of the neighboring coordinates is in the index of symbols.
+        """
+        # the cells of the number itself are digits, so they are never in the index
+        return any(coordinates in symbols for coordinates in self.neighbor_coordinates())
     
-    def set_part_number(self, matrix: List[List[Element]]) -> None:
-        self.part_number = self.is_part_number(matrix=matrix)
+    def set_part_number(self, symbols: Set[Tuple[int, int]]) -> None:
+        self.part_number = self.is_part_number(symbols=symbols)
     
 
 
 class Engine:
+    # the numbers of an engine built from the parsed elements instead of the schema
+    numbers: Optional[List[Number]] = None
+
     def __init__(self, schema: str):
         self.schema = schema
-        self.matrix = self.__get_symbol_matrix()
-
-    def __get_symbol_matrix(self) -> List[List[Element]]:
-        matrix = [
-            [
-                Symbol(char, x, y) if re.match(r"[^\w\d\n.]", char) else Period(x, y)
-                for x, char in enumerate(line)
-            ]
-            for y, line in enumerate(self.schema.splitlines())
-        ]
-        return matrix
+        self.symbols, self.stars = self.__get_symbol_index()
 
-    def get_part_numbers(self) -> List[Number]:
-        numbers = [
+    @classmethod
+    def from_elements(cls, numbers: List[Tuple[int, int, int, int]], symbols: List[Tuple[int, int, str]]) -> Engine:
+        """
+        Builds the engine from the (value, first x, last x, y) numbers and the
+        (x, y, character) symbols of the schema, e.g. parsed by 'parse_schema'.
+        """
+        engine = cls.__new__(cls)
+        engine.schema = None
+        engine.numbers = [Number(value, (start, end), y) for value, start, end, y in numbers]
+        engine.symbols = {(x, y) for x, y, _ in symbols}
+        engine.stars = {(x, y): Symbol("*", x, y) for x, y, char in symbols if char == "*"}
+        return engine
+
+    def __get_symbol_index(self) -> Tuple[Set[Tuple[int, int]], Dict[Tuple[int, int], Symbol]]:
+        """
+        Collects the (x, y) coordinates of every symbol of the schema in one pass,
+        keeping a Symbol instance only for the '*' ones that may be gears.
+        """
+        symbols = set()
+        stars = {}
+        for y, line in enumerate(self.schema.splitlines()):
+            for match in re.finditer(r"[^\w\d\n.]", line):
+                x = match.start(0)
+                symbols.add((x, y))
+                if match.group(0) == "*":
+                    stars[(x, y)] = Symbol("*", x, y)
+        return symbols, stars
+
+    def get_numbers(self) -> List[Number]:
+        if self.numbers is not None:
+            return list(self.numbers)
+        return [
             Number(int(match.group(0)), (match.start(0), match.end(0)-1), y)
             for y, line in enumerate(self.schema.splitlines())
             for match in re.finditer(r"(\d+)", line)
         ]
-        return list(filter(lambda x: x.is_part_number(self.matrix), numbers))
+
+    def get_part_numbers(self) -> List[Number]:
+        return list(filter(lambda x: x.is_part_number(self.symbols), self.get_numbers()))
     
     def get_gears(self) -> List[Symbol]:
-        part_numbers = self.get_part_numbers()
-        gears = [
-            symbol
-            for line in self.matrix
-            for symbol in line
-            if symbol.value == "*" and symbol.check_gear(part_numbers)
+        """
+        Registers every number against the '*' symbols around it in a single sweep,
+        then keeps as gears the ones with exactly two neighbouring numbers.
+        """
+        neighbours: Dict[Tuple[int, int], List[Number]] = {}
+        for number in self.get_numbers():
+            for coordinates in number.neighbor_coordinates():
+                if coordinates in self.stars:
+                    neighbours.setdefault(coordinates, []).append(number)
+
+        gears = []
+        for coordinates, symbol in self.stars.items():
+            numbers = neighbours.get(coordinates, [])
+            if len(numbers) == 2:
+                symbol.gear_ratio = numbers[0].value * numbers[1].value
+                gears.append(symbol)
+        return gears
+
+class NumpyEngine(Engine):
+    """
+    Engine backend that works on the schema as a uint8 grid with vectorized passes.
+
+    Attributes:
+        grid (np.ndarray): The characters of the schema, padded with periods on the right.
+        mask (np.ndarray): The cells that have a symbol in their 3x3 neighbourhood.
+    """
+
+    def __init__(self, schema: str):
+        import numpy as np
+
+        self.schema = schema
+        self.grid = self.__get_grid()
+        self.mask = self.__get_neighbour_mask()
+        self.stars = {
+            (x, y): Symbol("*", x, y)
+            for y, x in np.argwhere(self.grid == ord("*")).tolist()
+        }
+
+    def __get_grid(self) -> np.ndarray:
+        import numpy as np
+
+        lines = self.schema.splitlines()
+        width = max((len(line) for line in lines), default=0)
+        # one extra column of periods keeps the digit runs of two rows apart
+        padded = "".join(line.ljust(width + 1, ".") for line in lines)
+        if not padded.isascii():
+            padded = "".join(char if char.isascii() else self.__to_ascii(char) for char in padded)
+        return np.frombuffer(padded.encode("ascii"), dtype=np.uint8).reshape(len(lines), width + 1)
+
+    @staticmethod
+    def __to_ascii(char: str) -> str:
+        """
+        Replaces a non-ASCII character with an ASCII one of the same class for the
+        regular expressions of Engine: a digit, a word character or a symbol.
+        """
+        if re.fullmatch(r"\d", char):
+            return str(int(char))
+        return "a" if re.fullmatch(r"\w", char) else "#"
+
+    def __get_neighbour_mask(self) -> np.ndarray:
+        """
+        Computes the symbol mask of the grid and dilates it with a 3x3 neighbourhood.
+        """
+        import numpy as np
+
+        grid = self.grid
+        word = (
+            ((grid >= ord("0")) & (grid <= ord("9")))
+            | ((grid >= ord("a")) & (grid <= ord("z")))
+            | ((grid >= ord("A")) & (grid <= ord("Z")))
+            | (grid == ord("_"))
+        )
+        symbols = np.pad(~word & (grid != ord(".")), 1)
+
+        rows, cols = grid.shape
+        mask = np.zeros(grid.shape, dtype=bool)
+        for dy in range(3):
+            for dx in range(3):
+                mask |= symbols[dy:dy + rows, dx:dx + cols]
+        return mask
+
+    def get_part_numbers(self) -> List[Number]:
+        import numpy as np
+
+        digits = ((self.grid >= ord("0")) & (self.grid <= ord("9"))).ravel()
+        touching = np.concatenate(([0], np.cumsum(digits & self.mask.ravel())))
+
+        # label the digit runs by the positions where a run starts and ends
+        edges = np.diff(digits.astype(np.int8), prepend=0, append=0)
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+        is_part = touching[ends] > touching[starts]
+
+        width = self.grid.shape[1]
+        cells = self.grid.tobytes()
+        return [
+            Number(int(cells[start:end]), (start % width, (end - 1) % width), start // width)
+            for start, end in zip(starts[is_part].tolist(), ends[is_part].tolist())
         ]
+
+
+@dataclass
+class Row:
+    """
+    Represents a parsed row of the schema.
+
+    Attributes:
+        numbers (List[Number]): The numbers of the row.
+        symbols (Set[Tuple[int, int]]): The (x, y) coordinates of the symbols of the row.
+        stars (Dict[Tuple[int, int], Symbol]): The '*' symbols of the row.
+    """
+
+    numbers: List[Number]
+    symbols: Set[Tuple[int, int]]
+    stars: Dict[Tuple[int, int], Symbol]
+
+
+class StreamingEngine:
+    """
+    Engine that reads the schema line by line (e.g. from an open file), keeping
+    only a window of three rows in memory and emitting the results of a row as
+    soon as the row below it has been read.
+
+    The lines are read once: use 'iter_rows' to get both the part numbers and
+    the gears of a stream, since a second pass over an iterator raises a ValueError.
+    """
+
+    def __init__(self, lines: Iterable[str]):
+        self.lines = lines
+        self.consumed = False
+
+    def __read_row(self, line: str, y: int) -> Row:
+        numbers = [
+            Number(int(match.group(0)), (match.start(0), match.end(0)-1), y)
+            for match in re.finditer(r"(\d+)", line)
+        ]
+        symbols = set()
+        stars = {}
+        for match in re.finditer(r"[^\w\d\n.]", line):
+            symbols.add((match.start(0), y))
+            if match.group(0) == "*":
+                stars[(match.start(0), y)] = Symbol("*", match.start(0), y)
+        return Row(numbers, symbols, stars)
+
+    def __get_windows(self) -> Iterator[Tuple[Optional[Row], Row, Optional[Row]]]:
+        """
+        Yields every row together with the rows above and below it, if any.
+        """
+        if self.consumed:
+            raise ValueError("The lines of the schema were already read, they can be streamed only once")
+        # an iterator (e.g. an open file) is exhausted by the pass, a list can be read again
+        self.consumed = iter(self.lines) is self.lines
+        previous, current = None, None
+        for y, line in enumerate(self.lines):
+            row = self.__read_row(line.rstrip("\r\n"), y)
+            if current is not None:
+                yield previous, current, row
+            previous, current = current, row
+        if current is not None:
+            yield previous, current, None
+
+    def __get_part_numbers(self, window: Tuple[Optional[Row], Row, Optional[Row]]) -> List[Number]:
+        symbols = set().union(*(row.symbols for row in window if row is not None))
+        return [number for number in window[1].numbers if number.is_part_number(symbols)]
+
+    def __get_gears(self, window: Tuple[Optional[Row], Row, Optional[Row]]) -> List[Symbol]:
+        stars = window[1].stars
+        neighbours: Dict[Tuple[int, int], List[Number]] = {}
+        for row in window:
+            if row is None:
+                continue
+            for number in row.numbers:
+                for coordinates in number.neighbor_coordinates():
+                    if coordinates in stars:
+                        neighbours.setdefault(coordinates, []).append(number)
+
+        gears = []
+        for coordinates, symbol in stars.items():
+            numbers = neighbours.get(coordinates, [])
+            if len(numbers) == 2:
+                symbol.gear_ratio = numbers[0].value * numbers[1].value
+                gears.append(symbol)
         return gears
 
+    def iter_rows(self) -> Iterator[Tuple[List[Number], List[Symbol]]]:
+        """
+        Yields the part numbers and the gears of every row in a single pass over the lines.
+        """
+        for window in self.__get_windows():
+            yield self.__get_part_numbers(window), self.__get_gears(window)
 
-if __name__ == "__main__":
-    file_path = "../input.txt"
+    def iter_part_numbers(self) -> Iterator[Number]:
+        for window in self.__get_windows():
+            yield from self.__get_part_numbers(window)
+
+    def get_part_numbers(self) -> List[Number]:
+        return list(self.iter_part_numbers())
+
+    def iter_gears(self) -> Iterator[Symbol]:
+        for window in self.__get_windows():
+            yield from self.__get_gears(window)
+
+    def get_gears(self) -> List[Symbol]:
+        return list(self.iter_gears())
+
+
+def read_engine(file_path: str) -> Engine:
     with open(file_path) as file:
-        engine_schema = file.read()
+        return Engine(file.read())
+
+
+def solve(input_path: str) -> int:
+    """
+    Returns the answer of the puzzle for the given input file.
+    """
+    from utils.cache import cached_parse
+    from utils.parsers import parse_schema
+
+    engine = Engine.from_elements(*cached_parse(parse_schema, input_path))
+    return sum(g.gear_ratio for g in engine.get_gears())
+
 
-    engine = Engine(engine_schema)
+if __name__ == "__main__":
+    sys.path.append(str(Path(__file__).resolve().parents[2]))
+    from utils.cache import cached_parse
+    from utils.parsers import parse_schema
+
+    file_path = "../input.txt"
+    engine = Engine.from_elements(*cached_parse(parse_schema, file_path))
     gears = engine.get_gears()
     
     gears_ratio = [g.gear_ratio for g in gears]
     sum_gears_ration = sum(gears_ratio)
-    
-    
-    print(f"Gears: {gears}")
-    print(f"Sum: {sum_gears_ration}")
+
+    if VERBOSE:
+        print(f"Gears: {gears}")
+    print(f"Sum: {sum_gears_ration} ({len(gears)} gears)")
@@ -1,43 +1,74 @@
+from __future__ import annotations
 from dataclasses import dataclass
-from typing import List
+import os
+from typing import TYPE_CHECKING, List
 import re
+import sys
 from pathlib import Path
 from copy import copy
 
+if TYPE_CHECKING:
+    import numpy as np
 
-@dataclass
+VERBOSE = bool(os.environ.get("AOC_VERBOSE"))
+
+CARD_PATTERN = r"^Card\s+(\d+):([\s*\d+\s*]+)\|([\s*\d+\s*]+)$"
+FORMAT_ERROR = "Line formatted in a wrong way. It should be like: 'Card 1: 41 48 83 86 17 | 83 86  6 31 17  9 48 53'"
+
+
+@dataclass(slots=True)
 class Card:
     id: int
     owned_numbers: List[int]
     winning_numbers: List[int]
-    points: List[int]
-    owned_winning_numbers: List[int]
+    matches: int
+    points: int
+    copies: List[int]
+    memory: List[int]
 
     def __init__(self, line: str):
-        pattern = r"^Card\s+(\d+):([\s*\d+\s*]+)\|([\s*\d+\s*]+)$"
-
         # Use re.match to search for the pattern in the line
-        match = re.match(pattern, line)
+        match = re.match(CARD_PATTERN, line)
 
         if match:
-            self.id = int(match.group(1))
-            self.owned_numbers = [int(n) for n in match.group(2).split()]
-            self.winning_numbers = [int(n) for n in match.group(3).split()]
-            self.points = self.__get_points()
-            self.copies = []
-            self.memory = []
-        else:
-            raise ValueError(
-                "Line formatted in a wrong way. It should be like: 'Card 1: 41 48 83 86 17 | 83 86  6 31 17  9 48 53'"
+            self.__set_numbers(
+                int(match.group(1)),
+                [int(n) for n in match.group(2).split()],
+                [int(n) for n in match.group(3).split()],
             )
+        else:
+            raise ValueError(FORMAT_ERROR)
+
+    @classmethod
+    def from_numbers(cls, id: int, owned_numbers: List[int], winning_numbers: List[int]) -> Card:
+        """
+        Builds the card from its already parsed numbers, e.g. a row of 'parse_cards'.
+        """
+        card = cls.__new__(cls)
+        card.__set_numbers(id, owned_numbers, winning_numbers)
+        return card
+
+    def __set_numbers(self, id: int, owned_numbers: List[int], winning_numbers: List[int]) -> None:
+        self.id = id
+        self.owned_numbers = owned_numbers
+        self.winning_numbers = winning_numbers
+        self.matches = self.__count_matches()
+        self.points = self.__get_points()
+        self.copies = []
+        self.memory = []
+
+    def __count_matches(self) -> int:
+        winning_numbers = set(self.winning_numbers)
+        return sum(1 for n in self.owned_numbers if n in winning_numbers)
 
     @property
     def owned_winning_numbers(self):
-        return [n for n in self.owned_numbers if n in self.winning_numbers]
+        winning_numbers = set(self.winning_numbers)
+        return [n for n in self.owned_numbers if n in winning_numbers]
 
     def __get_points(self):
-        if len(self.owned_winning_numbers) > 0:
-            return 2 ** (len(self.owned_winning_numbers) - 1)
+        if self.matches > 0:
+            return 2 ** (self.matches - 1)
         else:
             return 0
 
@@ -45,6 +76,62 @@ class Card:
         self.copies = copies
 
 
+@dataclass
+class Deck:
+    """
+    Columnar representation of a deck of cards, with one row per card.
+
+    Attributes:
+        ids (np.ndarray): The id of each card.
+        owned_numbers (np.ndarray): The owned numbers of each card.
+        winning_numbers (np.ndarray): The winning numbers of each card.
+    """
+
+    MAX_TABLE_CELLS = 10_000_000
+    CHUNK_SIZE = 10_000_000  # owned times winning numbers compared at once without the table
+
+    ids: np.ndarray
+    owned_numbers: np.ndarray
+    winning_numbers: np.ndarray
+
+    @property
+    def matches(self) -> np.ndarray:
+        """
+        Counts the owned numbers of each card that are also winning numbers.
+
+        When the numbers are small enough, a lookup table with a row per card tells
+        which numbers are winning. Otherwise the owned and the winning numbers of the
+        cards are compared with each other, in chunks of cards to bound the memory.
+        """
+        import numpy as np
+
+        if len(self.ids) == 0:
+            return np.zeros(0, dtype=np.int64)
+
+        max_number = int(max(self.owned_numbers.max(initial=0), self.winning_numbers.max(initial=0)))
+        if len(self.ids) * (max_number + 1) <= self.MAX_TABLE_CELLS:
+            rows = np.arange(len(self.ids))[:, None]
+            is_winning = np.zeros((len(self.ids), max_number + 1), dtype=bool)
+            is_winning[rows, self.winning_numbers] = True
+            return is_winning[rows, self.owned_numbers].sum(axis=1)
+
+        matches = np.zeros(len(self.ids), dtype=np.int64)
+        row_size = max(1, self.owned_numbers.shape[1] * self.winning_numbers.shape[1])
+        step = max(1, self.CHUNK_SIZE // row_size)
+        for start in range(0, len(self.ids), step):
+            owned = self.owned_numbers[start:start + step]
+            winning = self.winning_numbers[start:start + step]
+            matches[start:start + step] = (owned[:, :, None] == winning[:, None, :]).any(axis=2).sum(axis=1)
+        return matches
+
+    @property
+    def points(self) -> np.ndarray:
+        import numpy as np
+
+        matches = self.matches
+        return np.where(matches > 0, np.left_shift(1, np.maximum(matches - 1, 0)), 0)
+
+
 def read_cards(input_path: str) -> List[Card]:
     cards = []
     with open(input_path) as file:
@@ -54,6 +141,92 @@ def read_cards(input_path: str) -> List[Card]:
     return cards
 
 
+def read_numbers(data: bytes) -> np.ndarray:
+    """
+    Converts every run of digits of the bytes into a number at once, without
+    creating an intermediate string for each of them.
+    """
+    import numpy as np
+
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    is_digit = (buffer >= ord("0")) & (buffer <= ord("9"))
+    if not is_digit.any():
+        return np.zeros(0, dtype=np.int64)
+
+    edges = np.diff(is_digit.astype(np.int8), prepend=0, append=0)
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    lengths = ends - starts
+
+    # weight each digit by the power of ten of its position in the run
+    positions = np.flatnonzero(is_digit)
+    digits = buffer[positions].astype(np.int64) - ord("0")
+    powers = np.repeat(ends, lengths) - positions - 1
+    return np.add.reduceat(digits * 10 ** powers, np.cumsum(lengths) - lengths)
+
+
+def read_deck(input_path: str, validate: bool = False) -> Deck:
+    """
+    Reads the cards into a columnar Deck instead of a list of Card instances.
+    All the cards must have the same amount of owned and winning numbers.
+
+    The file is read in binary and split using the ':' and '|' offsets of every card,
+    which must have as many owned and winning numbers as the first one. With 'validate'
+    every line is also checked against the format of a Card.
+    """
+    import numpy as np
+
+    with open(input_path, "rb") as file:
+        data = file.read()
+
+    n_cards = data.count(b":")
+    if n_cards == 0:
+        empty = np.zeros((0, 0), dtype=np.int64)
+        return Deck(ids=np.zeros(0, dtype=np.int64), owned_numbers=empty, winning_numbers=empty)
+
+    first_line = data.split(b"\n", 1)[0]
+    colon, bar = first_line.find(b":"), first_line.find(b"|")
+    n_owned = len(first_line[colon + 1:bar].split())
+    n_winning = len(first_line[bar + 1:].split())
+
+    if validate:
+        for line in data.splitlines():
+            match = re.match(CARD_PATTERN.encode(), line)
+            if not match or len(match.group(2).split()) != n_owned or len(match.group(3).split()) != n_winning:
+                raise ValueError(FORMAT_ERROR)
+
+    # count the numbers between the ':' and '|' of every card by the offsets of the digit runs
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    is_digit = (buffer >= ord("0")) & (buffer <= ord("9"))
+    run_starts = np.flatnonzero(np.diff(is_digit.astype(np.int8), prepend=0) == 1)
+    colons = np.flatnonzero(buffer == ord(":"))
+    bars = np.flatnonzero(buffer == ord("|"))
+    if colon < 0 or bar < colon or len(bars) != n_cards:
+        raise ValueError(FORMAT_ERROR)
+    if (bars <= colons).any() or (colons[1:] <= bars[:-1]).any():
+        raise ValueError(FORMAT_ERROR)
+
+    before_colons = np.searchsorted(run_starts, colons)
+    before_bars = np.searchsorted(run_starts, bars)
+    # the numbers after a '|' are the winning ones and the id of the next card
+    after_bars = np.append(before_colons[1:] - 1, len(run_starts)) - before_bars
+    if (
+        before_colons[0] != 1
+        or (before_bars - before_colons != n_owned).any()
+        or (after_bars != n_winning).any()
+    ):
+        raise ValueError(FORMAT_ERROR)
+
+    numbers = read_numbers(data)
+
+    table = numbers.reshape(n_cards, 1 + n_owned + n_winning)
+    return Deck(
+        ids=table[:, 0],
+        owned_numbers=table[:, 1:1 + n_owned],
+        winning_numbers=table[:, 1 + n_owned:],
+    )
+
+
 def not_efficient_process_copies(cards: List[Card]) -> List[Card]:
     """
     This method does the same of 'preprocess_copies' but it has an high computational complexity.
@@ -64,7 +237,8 @@ def not_efficient_process_copies(cards: List[Card]) -> List[Card]:
 
     while i < len(cards):
         card = cards[i]
-        print(f"Processing copies for card {card.id}...")
+        if VERBOSE:
+            print(f"Processing copies for card {card.id}...")
         for j in range(1, card.points + 1):
             # add subsequent copies
             copy_id = card.id + j
@@ -75,12 +249,16 @@ def not_efficient_process_copies(cards: List[Card]) -> List[Card]:
 
 
 def process_copies(cards: List[Card]) -> List[int]:
+    """
+    This method returns the id of every original and copied card, so its memory grows
+    with the total number of copies. It is kept for debugging, use 'count_copies' instead.
+    """
     for i in range(len(cards)):
         # add subsequent copies
         cards[i].set_copies(
             [
                 cards[i].id + j
-                for j in range(1, len(cards[i].owned_winning_numbers) + 1)
+                for j in range(1, cards[i].matches + 1)
                 if i + j < len(cards)
             ]
         )
@@ -99,11 +277,51 @@ def process_copies(cards: List[Card]) -> List[int]:
     )
 
 
+def count_copies(cards: List[Card]) -> List[int]:
+    """
+    Counts the instances (original plus copies) of each card by propagating
+    the number of instances of a card forward to the cards it wins.
+    """
+    counts = [1] * len(cards)
+    for i, card in enumerate(cards):
+        for j in range(i + 1, min(i + 1 + card.matches, len(cards))):
+            counts[j] += counts[i]
+    return counts
+
+
+def count_deck_copies(deck: Deck) -> np.ndarray:
+    """
+    Does the same of 'count_copies' over the columnar match counts of a Deck.
+    """
+    import numpy as np
+
+    matches = deck.matches
+    counts = np.ones(len(matches), dtype=np.int64)
+    for i, card_matches in enumerate(matches.tolist()):
+        counts[i + 1:i + 1 + card_matches] += counts[i]
+    return counts
+
+
+def solve(input_path: str) -> int:
+    """
+    Returns the answer of the puzzle for the given input file.
+    """
+    from utils.cache import cached_parse
+    from utils.parsers import parse_cards
+
+    return sum(count_copies([Card.from_numbers(*row) for row in cached_parse(parse_cards, input_path)]))
+
+
 if __name__ == "__main__":
+    sys.path.append(str(Path(__file__).resolve().parents[2]))
+    from utils.cache import cached_parse
+    from utils.parsers import parse_cards
+
     input_path = Path(__file__).parent.parent / "input.txt"
-    cards = read_cards(input_path)
-    print(f"Cards before copies: {[c.id for c in cards]}")
-    copied_cards = process_copies(cards)
-    total_cards = len(copied_cards)
-    print(f"Cards with copies: {copied_cards}")
-    print(f"Total cards: {total_cards}")
+    cards = [Card.from_numbers(*row) for row in cached_parse(parse_cards, input_path)]
+    card_counts = count_copies(cards)
+    total_cards = sum(card_counts)
+    if VERBOSE:
+        print(f"Cards before copies: {[c.id for c in cards]}")
+        print(f"Cards instances: {card_counts}")
+    print(f"Total cards: {total_cards} ({len(cards)} original cards)")
@@ -1,49 +1,145 @@
+from __future__ import annotations
+from bisect import bisect_right
 from dataclasses import dataclass
+import os
 from pathlib import Path
 import re
-from typing import List
-from pprint import pprint
+import sys
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+VERBOSE = bool(os.environ.get("AOC_VERBOSE"))
+
+# below this many seeds, bisect lookups are faster than importing numpy
+VECTORIZE_THRESHOLD = 10_000
 
 
 @dataclass
 class Seed:
+    """
+    Represents a seed followed through every map of the almanac.
+
+    Attributes:
+        id (int): The id of the seed.
+        location (int): The value of the seed in the last category of the almanac.
+        categories (Dict[str, int]): The value of the seed in every category, in the order of the almanac.
+    """
+
     id: int
-    soil: int
-    fertilize: int
-    water: int
-    light: int
-    temperature: int
-    humidity: int
     location: int
+    categories: Dict[str, int]
 
 
 class AlmanacMap:
     def __init__(self) -> None:
         self.range_mapping = []
+        self.frozen = False
+        self.arrays = None
 
     def add(self, dst_start: int, src_start: int, range_length: int) -> None:
         src_end = src_start + range_length - 1
         self.range_mapping.append((src_start, src_end, dst_start))
+        self.frozen = False
+
+    def freeze(self) -> None:
+        """
+        Sorts the source intervals into boundary arrays used for binary-search lookups.
+
+        Attributes:
+            starts (List[int]): The sorted first keys of the source intervals.
+            ends (List[int]): The (exclusive) last keys of the source intervals.
+            offsets (List[int]): The value added to a key falling in the interval.
+        """
+        ordered = sorted(self.range_mapping)
+        self.starts = [src_start for src_start, _, _ in ordered]
+        self.ends = [src_end + 1 for _, src_end, _ in ordered]
+        self.offsets = [dst_start - src_start for src_start, _, dst_start in ordered]
+        self.frozen = True
+        self.arrays = None
+
+    def lookup_range(self, start: int, end: int) -> List[Tuple[int, int, int]]:
+        """
+        Splits the half-open range [start, end) across the source intervals of the map.
+
+        Returns a list of (src_start, dst_start, length) fragments covering the whole
+        input range, where the gaps between source intervals are passed through unchanged.
+        """
+        if not self.frozen:
+            self.freeze()
+
+        fragments = []
+        i = max(0, bisect_right(self.starts, start) - 1)
+        while start < end and i < len(self.starts) and self.starts[i] < end:
+            src_start, src_end, offset = self.starts[i], self.ends[i], self.offsets[i]
+            i += 1
+            if src_end <= start:
+                continue
+            if start < src_start:
+                # gap before the source interval maps to itself
+                fragments.append((start, start, src_start - start))
+                start = src_start
+            stop = min(end, src_end)
+            fragments.append((start, start + offset, stop - start))
+            start = stop
+        if start < end:
+            fragments.append((start, start, end - start))
+        return fragments
+
+    def compose(self, other: AlmanacMap) -> AlmanacMap:
+        """
+        Builds the piecewise-linear map equivalent to looking up a key in this map
+        and then looking up the result in the other map.
+        """
+        if not self.frozen:
+            self.freeze()
+        if not other.frozen:
+            other.freeze()
+
+        composed = AlmanacMap()
+        bounds = self.starts + self.ends + other.starts + other.ends
+        if not bounds:
+            return composed
+
+        # outside of both maps every key is mapped to itself
+        for src_start, dst_start, length in self.lookup_range(min(bounds), max(bounds)):
+            for mid_start, final_start, fragment_length in other.lookup_range(dst_start, dst_start + length):
+                key = src_start + mid_start - dst_start
+                if key != final_start:
+                    composed.add(final_start, key, fragment_length)
+        composed.freeze()
+        return composed
 
     def lookup(self, key):
-        for src_start, src_end, dst_start in self.range_mapping:
-            if src_start <= key <= src_end:
-                return key - src_start + dst_start
+        if not self.frozen:
+            self.freeze()
+
+        i = bisect_right(self.starts, key) - 1
+        if i >= 0 and key < self.ends[i]:
+            return key + self.offsets[i]
         return key
 
-    def __getitem__(self, key):
-        return self.lookup(key)
+    def lookup_array(self, keys: np.ndarray) -> np.ndarray:
+        """
+        Looks up a whole int64 array of keys at once with a vectorized binary search.
+        """
+        import numpy as np
 
+        if not self.frozen:
+            self.freeze()
+        if not self.starts:
+            return keys.copy()
+        if self.arrays is None:
+            self.arrays = tuple(np.array(a, dtype=np.int64) for a in (self.starts, self.ends, self.offsets))
 
-def process_mapping(input: str, pattern: str) -> AlmanacMap:
-    mapping = AlmanacMap()
-    match = re.search(pattern, input)
-    if match:
-        matched_lines = match.group(1)
-        lines = matched_lines.strip().split("\n")
-        for line in lines:
-            mapping.add(*[int(v) for v in line.strip().split()])
-    return mapping
+        starts, ends, offsets = self.arrays
+        i = np.searchsorted(starts, keys, side="right") - 1
+        inside = (i >= 0) & (keys < ends[i])
+        return keys + np.where(inside, offsets[i], 0)
+
+    def __getitem__(self, key):
+        return self.lookup(key)
 
 
 def read_seeds(input: str) -> List[int]:
@@ -54,56 +150,129 @@ def read_seeds(input: str) -> List[int]:
     raise ValueError("Bad format in the seeds definition line")
 
 
-def process_almanac(input) -> List[Seed]:
-    mapping_patterns = {
-        "seed_to_soil": r"seed-to-soil map:\s*\n([\d+\s+\d+\s+\d+\s*\n]+)",
-        "soil_to_fertilizer": r"soil-to-fertilizer map:\s*\n([\d+\s+\d+\s+\d+\s*\n]+)",
-        "fertilizer_to_water": r"fertilizer-to-water map:\s*\n([\d+\s+\d+\s+\d+\s*\n]+)",
-        "water_to_light": r"water-to-light map:\s*\n([\d+\s+\d+\s+\d+\s*\n]+)",
-        "light_to_temperature": r"light-to-temperature map:\s*\n([\d+\s+\d+\s+\d+\s*\n]+)",
-        "temperature_to_humidity": r"temperature-to-humidity map:\s*\n([\d+\s+\d+\s+\d+\s*\n]+)",
-        "humidity_to_location": r"humidity-to-location map:\s*\n([\d+\s+\d+\s+\d+\s*\n]+)",
-    }
+def read_almanac(lines: Iterable[str]) -> Tuple[List[int], Dict[str, AlmanacMap]]:
+    """
+    Parses the almanac in a single pass over its lines (e.g. an open file).
+
+    Every 'X-to-Y map:' section becomes an 'X_to_Y' mapping, kept in the order of
+    the file, and each section must start from the category the previous one ended in.
+    """
+    seeds = None
+    mappings = {}
+    mapping = None
+    destination = None
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+
+        if line.startswith("seeds:"):
+            seeds = read_seeds(line)
+            continue
+
+        header = re.match(r"^(\w+)-to-(\w+) map:$", line)
+        if header:
+            source, target = header.groups()
+            if destination is not None and source != destination:
+                raise ValueError(f"Map '{line}' does not start from the '{destination}' category")
+            key = f"{source}_to_{target}"
+            if VERBOSE:
+                print(f"Processing mapping {key}...")
+            mapping = mappings[key] = AlmanacMap()
+            destination = target
+        elif mapping is not None:
+            mapping.add(*[int(v) for v in line.split()])
+        else:
+            raise ValueError(f"Range line outside of a map section: '{line}'")
 
+    if seeds is None:
+        raise ValueError("Bad format in the seeds definition line")
+    return seeds, mappings
+
+
+def build_mappings(sections: List[Tuple[str, str, List[Tuple[int, int, int]]]]) -> Dict[str, AlmanacMap]:
+    """
+    Builds the 'X_to_Y' mappings from the (source, target, ranges) sections of the
+    almanac, e.g. parsed by 'parse_almanac'.
+    """
     mappings = {}
-    for key, pattern in mapping_patterns.items():
-        print(f"Processing mapping {key}...")
-        mappings[key] = process_mapping(input, pattern)
-
-    seed_ids = read_seeds(input)
-
-    seeds = []
-    for id in seed_ids:
-        print(f"Processing seed {id}...")
-        soil = mappings["seed_to_soil"][id]
-        fertilizer = mappings["soil_to_fertilizer"][soil]
-        water = mappings["fertilizer_to_water"][fertilizer]
-        light = mappings["water_to_light"][water]
-        temperature = mappings["light_to_temperature"][light]
-        humidity = mappings["temperature_to_humidity"][temperature]
-        location = mappings["humidity_to_location"][humidity]
-        seeds.append(
-            Seed(
-                id=id,
-                soil=soil,
-                fertilize=fertilizer,
-                water=water,
-                light=light,
-                temperature=temperature,
-                humidity=humidity,
-                location=location,
-            )
+    for source, target, ranges in sections:
+        key = f"{source}_to_{target}"
+        if VERBOSE:
+            print(f"Processing mapping {key}...")
+        mapping = mappings[key] = AlmanacMap()
+        for dst_start, src_start, range_length in ranges:
+            mapping.add(dst_start, src_start, range_length)
+    return mappings
+
+
+def process_seeds(seed_ids: List[int], mappings: Dict[str, AlmanacMap], vectorize: Optional[bool] = None) -> List[Seed]:
+    """
+    Follows every seed through the maps of the almanac, with bisect lookups or, with
+    'vectorize' (by default from VECTORIZE_THRESHOLD seeds on), with numpy arrays.
+    """
+    chain = list(mappings.values())
+    # 'read_almanac' checks that each map starts from the category the previous one ends in,
+    # so the categories are the source of every map and the target of the last one
+    keys = list(mappings)
+    categories = [key.split("_to_")[0] for key in keys] + [keys[-1].split("_to_")[-1] if keys else "seed"]
+
+    if VERBOSE:
+        print(f"Processing {len(seed_ids)} seeds...")
+    if vectorize is None:
+        vectorize = len(seed_ids) >= VECTORIZE_THRESHOLD
+    if not vectorize:
+        columns = [list(seed_ids)]
+        for mapping in chain:
+            columns.append([mapping.lookup(key) for key in columns[-1]])
+    else:
+        import numpy as np
+
+        # push the whole array of seeds through each mapping at once
+        columns = [np.array(seed_ids, dtype=np.int64)]
+        for mapping in chain:
+            columns.append(mapping.lookup_array(columns[-1]))
+
+    seeds = [
+        Seed(
+            id=int(values[0]),
+            location=int(values[-1]),
+            categories={category: int(value) for category, value in zip(categories, values)},
         )
+        for values in zip(*columns)
+    ]
 
     return seeds
 
 
+def process_almanac(input: Iterable[str]) -> List[Seed]:
+    seed_ids, mappings = read_almanac(input)
+    return process_seeds(seed_ids, mappings)
+
+
+def solve(input_path: str) -> int:
+    """
+    Returns the answer of the puzzle for the given input file.
+    """
+    from utils.cache import cached_parse
+    from utils.parsers import parse_almanac
+
+    seed_ids, sections = cached_parse(parse_almanac, input_path)
+    return min(s.location for s in process_seeds(seed_ids, build_mappings(sections)))
+
+
 if __name__ == "__main__":
+    sys.path.append(str(Path(__file__).resolve().parents[2]))
+    from utils.cache import cached_parse
+    from utils.parsers import parse_almanac
+
     input_path = Path(__file__).parent.parent / "input.txt"
-    with open(input_path, "r") as file:
-        input_str = file.read()
-        seeds = process_almanac(input_str)
-        min_location = min([s.location for s in seeds])
+    seed_ids, sections = cached_parse(parse_almanac, input_path)
+    seeds = process_seeds(seed_ids, build_mappings(sections))
+    min_location = min([s.location for s in seeds])
+    if VERBOSE:
+        from pprint import pprint
+
         print("\nSEEDS")
         pprint(seeds)
-        print(f"Lowest location: {min_location}")
+    print(f"Lowest location: {min_location} ({len(seeds)} seeds)")
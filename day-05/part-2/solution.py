@@ -1,9 +1,20 @@
+from __future__ import annotations
+from bisect import bisect_right
 from dataclasses import dataclass
+from functools import reduce
+import os
 from pathlib import Path
 import re
-from typing import List, Tuple
-from pprint import pprint
-from tqdm import tqdm
+import sys
+from typing import TYPE_CHECKING, Dict, Iterable, List, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+VERBOSE = bool(os.environ.get("AOC_VERBOSE"))
+
+DEFAULT_CHUNK_SIZE = 1_000_000
+DEFAULT_SHARD_SIZE = 50_000_000
 
 
 @dataclass
@@ -17,30 +28,111 @@ class Seed:
 class AlmanacMap:
     def __init__(self) -> None:
         self.range_mapping = []
+        self.frozen = False
+        self.arrays = None
 
     def add(self, dst_start: int, src_start: int, range_length: int) -> None:
         src_end = src_start + range_length - 1
         self.range_mapping.append((src_start, src_end, dst_start))
+        self.frozen = False
+
+    def freeze(self) -> None:
+        """
+        Sorts the source intervals into boundary arrays used for binary-search lookups.
+
+        Attributes:
+            starts (List[int]): The sorted first keys of the source intervals.
+            ends (List[int]): The (exclusive) last keys of the source intervals.
+            offsets (List[int]): The value added to a key falling in the interval.
+        """
+        ordered = sorted(self.range_mapping)
+        self.starts = [src_start for src_start, _, _ in ordered]
+        self.ends = [src_end + 1 for _, src_end, _ in ordered]
+        self.offsets = [dst_start - src_start for src_start, _, dst_start in ordered]
+        self.frozen = True
+        self.arrays = None
+
+    def lookup_range(self, start: int, end: int) -> List[Tuple[int, int, int]]:
+        """
+        Splits the half-open range [start, end) across the source intervals of the map.
+
+        Returns a list of (src_start, dst_start, length) fragments covering the whole
+        input range, where the gaps between source intervals are passed through unchanged.
+        """
+        if not self.frozen:
+            self.freeze()
+
+        fragments = []
+        i = max(0, bisect_right(self.starts, start) - 1)
+        while start < end and i < len(self.starts) and self.starts[i] < end:
+            src_start, src_end, offset = self.starts[i], self.ends[i], self.offsets[i]
+            i += 1
+            if src_end <= start:
+                continue
+            if start < src_start:
+                # gap before the source interval maps to itself
+                fragments.append((start, start, src_start - start))
+                start = src_start
+            stop = min(end, src_end)
+            fragments.append((start, start + offset, stop - start))
+            start = stop
+        if start < end:
+            fragments.append((start, start, end - start))
+        return fragments
+
+    def compose(self, other: AlmanacMap) -> AlmanacMap:
+        """
+        Builds the piecewise-linear map equivalent to looking up a key in this map
+        and then looking up the result in the other map.
+        """
+        if not self.frozen:
+            self.freeze()
+        if not other.frozen:
+            other.freeze()
+
+        composed = AlmanacMap()
+        bounds = self.starts + self.ends + other.starts + other.ends
+        if not bounds:
+            return composed
+
+        # outside of both maps every key is mapped to itself
+        for src_start, dst_start, length in self.lookup_range(min(bounds), max(bounds)):
+            for mid_start, final_start, fragment_length in other.lookup_range(dst_start, dst_start + length):
+                key = src_start + mid_start - dst_start
+                if key != final_start:
+                    composed.add(final_start, key, fragment_length)
+        composed.freeze()
+        return composed
 
     def lookup(self, key):
-        for src_start, src_end, dst_start in self.range_mapping:
-            if src_start <= key <= src_end:
-                return key - src_start + dst_start
+        if not self.frozen:
+            self.freeze()
+
+        i = bisect_right(self.starts, key) - 1
+        if i >= 0 and key < self.ends[i]:
+            return key + self.offsets[i]
         return key
 
-    def __getitem__(self, key):
-        return self.lookup(key)
+    def lookup_array(self, keys: np.ndarray) -> np.ndarray:
+        """
+        Looks up a whole int64 array of keys at once with a vectorized binary search.
+        """
+        import numpy as np
 
+        if not self.frozen:
+            self.freeze()
+        if not self.starts:
+            return keys.copy()
+        if self.arrays is None:
+            self.arrays = tuple(np.array(a, dtype=np.int64) for a in (self.starts, self.ends, self.offsets))
 
-def process_mapping(input: str, pattern: str) -> AlmanacMap:
-    mapping = AlmanacMap()
-    match = re.search(pattern, input)
-    if match:
-        matched_lines = match.group(1)
-        lines = matched_lines.strip().split("\n")
-        for line in lines:
-            mapping.add(*[int(v) for v in line.strip().split()])
-    return mapping
+        starts, ends, offsets = self.arrays
+        i = np.searchsorted(starts, keys, side="right") - 1
+        inside = (i >= 0) & (keys < ends[i])
+        return keys + np.where(inside, offsets[i], 0)
+
+    def __getitem__(self, key):
+        return self.lookup(key)
 
 
 def read_seeds(input: str) -> List[Tuple[int, int]]:
@@ -56,55 +148,224 @@ def read_seeds(input: str) -> List[Tuple[int, int]]:
     raise ValueError("Bad format in the seeds definition line")
 
 
-def process_almanac(input) -> List[Seed]:
-    mapping_patterns = {
-        "seed_to_soil": r"seed-to-soil map:\s*\n([\d+\s+\d+\s+\d+\s*\n]+)",
-        "soil_to_fertilizer": r"soil-to-fertilizer map:\s*\n([\d+\s+\d+\s+\d+\s*\n]+)",
-        "fertilizer_to_water": r"fertilizer-to-water map:\s*\n([\d+\s+\d+\s+\d+\s*\n]+)",
-        "water_to_light": r"water-to-light map:\s*\n([\d+\s+\d+\s+\d+\s*\n]+)",
-        "light_to_temperature": r"light-to-temperature map:\s*\n([\d+\s+\d+\s+\d+\s*\n]+)",
-        "temperature_to_humidity": r"temperature-to-humidity map:\s*\n([\d+\s+\d+\s+\d+\s*\n]+)",
-        "humidity_to_location": r"humidity-to-location map:\s*\n([\d+\s+\d+\s+\d+\s*\n]+)",
-    }
+def read_almanac(lines: Iterable[str]) -> Tuple[List[Tuple[int, int]], Dict[str, AlmanacMap]]:
+    """
+    Parses the almanac in a single pass over its lines (e.g. an open file).
 
+    Every 'X-to-Y map:' section becomes an 'X_to_Y' mapping, kept in the order of
+    the file, and each section must start from the category the previous one ended in.
+    """
+    seeds = None
     mappings = {}
-    for key, pattern in mapping_patterns.items():
-        print(f"Processing mapping {key}...")
-        mappings[key] = process_mapping(input, pattern)
+    mapping = None
+    destination = None
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+
+        if line.startswith("seeds:"):
+            seeds = read_seeds(line)
+            continue
+
+        header = re.match(r"^(\w+)-to-(\w+) map:$", line)
+        if header:
+            source, target = header.groups()
+            if destination is not None and source != destination:
+                raise ValueError(f"Map '{line}' does not start from the '{destination}' category")
+            key = f"{source}_to_{target}"
+            if VERBOSE:
+                print(f"Processing mapping {key}...")
+            mapping = mappings[key] = AlmanacMap()
+            destination = target
+        elif mapping is not None:
+            mapping.add(*[int(v) for v in line.split()])
+        else:
+            raise ValueError(f"Range line outside of a map section: '{line}'")
+
+    if seeds is None:
+        raise ValueError("Bad format in the seeds definition line")
+    return seeds, mappings
+
+
+def build_mappings(sections: List[Tuple[str, str, List[Tuple[int, int, int]]]]) -> Dict[str, AlmanacMap]:
+    """
+    Builds the 'X_to_Y' mappings from the (source, target, ranges) sections of the
+    almanac, e.g. parsed by 'parse_almanac'.
+    """
+    mappings = {}
+    for source, target, ranges in sections:
+        key = f"{source}_to_{target}"
+        if VERBOSE:
+            print(f"Processing mapping {key}...")
+        mapping = mappings[key] = AlmanacMap()
+        for dst_start, src_start, range_length in ranges:
+            mapping.add(dst_start, src_start, range_length)
+    return mappings
+
+
+def compose_mappings(mappings: Dict[str, AlmanacMap]) -> AlmanacMap:
+    """
+    Composes the chain of mappings into a single seed-to-location map.
+    """
+    return reduce(lambda first, second: first.compose(second), mappings.values())
+
+
+def locate_seeds(seed_ids: np.ndarray, mappings: Iterable[AlmanacMap]) -> Tuple[np.ndarray, int]:
+    """
+    Pushes an int64 array of seeds through each mapping with vectorized lookups.
+
+    Returns the array of locations and the index of the lowest one.
+    """
+    import numpy as np
 
-    seed_pairs = read_seeds(input)
+    locations = seed_ids
+    for mapping in mappings:
+        locations = mapping.lookup_array(locations)
+    return locations, int(np.argmin(locations))
 
+
+def split_seed_pairs(seed_pairs: List[Tuple[int, int]], shard_size: int) -> List[Tuple[int, int, int]]:
+    """
+    Splits the seed pairs into (pair index, first seed id, length) shards of at most 'shard_size' seeds.
+    """
+    return [
+        (pair_index, shard_start, min(shard_size, id + range_lenght - shard_start))
+        for pair_index, (id, range_lenght) in enumerate(seed_pairs)
+        for shard_start in range(id, id + range_lenght, shard_size)
+    ]
+
+
+# mapping shipped once to every worker process by 'init_worker'
+worker_seed_to_location: AlmanacMap = None
+worker_chunk_size: int = DEFAULT_CHUNK_SIZE
+
+
+def init_worker(seed_to_location: AlmanacMap, chunk_size: int) -> None:
+    global worker_seed_to_location, worker_chunk_size
+    worker_seed_to_location = seed_to_location
+    worker_chunk_size = chunk_size
+
+
+def process_shard(shard: Tuple[int, int, int]) -> Tuple[int, Seed, int]:
+    """
+    Locates every seed of the shard in array chunks of at most 'worker_chunk_size' seeds.
+
+    Returns the pair index, the seed with the lowest location and the number of processed seeds.
+    """
+    import numpy as np
+
+    pair_index, id, range_lenght = shard
+    best = None
+    for chunk_start in range(id, id + range_lenght, worker_chunk_size):
+        chunk_end = min(chunk_start + worker_chunk_size, id + range_lenght)
+        seed_ids = np.arange(chunk_start, chunk_end, dtype=np.int64)
+        locations, argmin = locate_seeds(seed_ids, [worker_seed_to_location])
+        if best is None or locations[argmin] < best.location:
+            best = Seed(id=int(seed_ids[argmin]), location=int(locations[argmin]))
+    return pair_index, best, range_lenght
+
+
+def not_efficient_process_almanac(
+    input: Iterable[str],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: int = 1,
+    shard_size: int = DEFAULT_SHARD_SIZE,
+) -> List[Seed]:
+    """
+    This method does the same of 'process_almanac' but it locates every single seed
+    of each range, in array chunks of at most 'chunk_size' seeds to bound the memory.
+    With the real input it still has to go through billions of seeds.
+
+    The seed pairs are split into shards of at most 'shard_size' seeds, which are
+    spread over a pool of 'workers' processes when more than one worker is requested.
+    """
+    from tqdm import tqdm
+
+    seed_pairs, mappings = read_almanac(input)
+    seed_to_location = compose_mappings(mappings)
+    shards = split_seed_pairs(seed_pairs, shard_size)
+
+    executor = None
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=init_worker,
+            initargs=(seed_to_location, chunk_size),
+        )
+        futures = [executor.submit(process_shard, shard) for shard in shards]
+        results = (future.result() for future in as_completed(futures))
+    else:
+        init_worker(seed_to_location, chunk_size)
+        results = map(process_shard, shards)
+
+    best_seeds: Dict[int, Seed] = {}
+    try:
+        with tqdm(total=sum(range_lenght for _, range_lenght in seed_pairs), unit="seed") as progress:
+            for pair_index, seed, range_lenght in results:
+                best = best_seeds.get(pair_index)
+                if best is None or (seed.location, seed.id) < (best.location, best.id):
+                    best_seeds[pair_index] = seed
+                progress.update(range_lenght)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    return [best_seeds[pair_index] for pair_index in sorted(best_seeds)]
+
+
+def process_seed_ranges(seed_pairs: List[Tuple[int, int]], mappings: Dict[str, AlmanacMap]) -> List[Seed]:
     seeds = []
     for id, range_lenght in seed_pairs:
-        print(f"Processing seed {id}...")
-        locations = []
-        for i in tqdm(range(range_lenght)):
-            soil = mappings["seed_to_soil"][id+i]
-            fertilizer = mappings["soil_to_fertilizer"][soil]
-            water = mappings["fertilizer_to_water"][fertilizer]
-            light = mappings["water_to_light"][water]
-            temperature = mappings["light_to_temperature"][light]
-            humidity = mappings["temperature_to_humidity"][temperature]
-            location = mappings["humidity_to_location"][humidity]
-            locations.append(location)
-            
-        argmin = locations.index(min(locations))
-        seeds.append(
-            Seed(
-                id=id+argmin,
-                location=locations[argmin],
-            )
-        )
+        if VERBOSE:
+            print(f"Processing seed {id}...")
+        # each fragment is (first seed id, current category value, length)
+        fragments = [(id, id, range_lenght)]
+        for mapping in mappings.values():
+            fragments = [
+                (seed_start + src_start - start, dst_start, fragment_length)
+                for seed_start, start, length in fragments
+                for src_start, dst_start, fragment_length in mapping.lookup_range(start, start + length)
+            ]
+
+        # the lowest location of a fragment is always reached at its first seed
+        seed_id, location, _ = min(fragments, key=lambda f: (f[1], f[0]))
+        seeds.append(Seed(id=seed_id, location=location))
 
     return seeds
 
 
+def process_almanac(input: Iterable[str]) -> List[Seed]:
+    seed_pairs, mappings = read_almanac(input)
+    return process_seed_ranges(seed_pairs, mappings)
+
+
+def solve(input_path: str) -> int:
+    """
+    Returns the answer of the puzzle for the given input file.
+    """
+    from utils.cache import cached_parse
+    from utils.parsers import parse_almanac
+
+    seed_ids, sections = cached_parse(parse_almanac, input_path)
+    seed_pairs = list(zip(seed_ids[0::2], seed_ids[1::2]))
+    return min(s.location for s in process_seed_ranges(seed_pairs, build_mappings(sections)))
+
+
 if __name__ == "__main__":
+    sys.path.append(str(Path(__file__).resolve().parents[2]))
+    from utils.cache import cached_parse
+    from utils.parsers import parse_almanac
+
     input_path = Path(__file__).parent.parent / "input.txt"
-    with open(input_path, "r") as file:
-        input_str = file.read()
-        seeds = process_almanac(input_str)
-        min_location = min([s.location for s in seeds])
+    seed_ids, sections = cached_parse(parse_almanac, input_path)
+    seeds = process_seed_ranges(list(zip(seed_ids[0::2], seed_ids[1::2])), build_mappings(sections))
+    min_location = min([s.location for s in seeds])
+    if VERBOSE:
+        from pprint import pprint
+
         print("\nSEEDS")
         pprint(seeds)
-        print(f"Lowest location: {min_location}")
+    print(f"Lowest location: {min_location} ({len(seeds)} seeds)")
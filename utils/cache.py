@@ -0,0 +1,69 @@
+from collections import OrderedDict
+import hashlib
+import os
+from pathlib import Path
+import pickle
+from typing import Any, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+CACHE_DIR = Path(os.environ.get("AOC_CACHE_DIR", Path(__file__).resolve().parent.parent / ".cache" / "parsed"))
+LRU_SIZE = 32
+
+# in-process LRU on top of the files on disk
+memory_cache: "OrderedDict[str, Any]" = OrderedDict()
+
+
+def file_digest(file_path: str) -> str:
+    with open(file_path, "rb") as file:
+        return hashlib.file_digest(file, "sha256").hexdigest()
+
+
+def parser_version(parser: Callable) -> str:
+    """
+    Fingerprint of the parser, i.e. the hash of the whole source file defining it,
+    so editing the parser or any helper next to it invalidates the cache.
+    """
+    source_file = parser.__code__.co_filename
+    if os.path.exists(source_file):
+        return file_digest(source_file)
+    # e.g. parsers defined interactively, fall back to their bytecode
+    return hashlib.sha256(parser.__code__.co_code).hexdigest()
+
+
+def cache_key(parser: Callable, file_path: str) -> str:
+    name = f"{parser.__module__}.{parser.__qualname__}"
+    key = hashlib.sha256(f"{name}:{parser_version(parser)}:{file_digest(file_path)}".encode())
+    return f"{parser.__qualname__}-{key.hexdigest()}"
+
+
+def cached_parse(parser: Callable[[str], T], file_path: str, cache_dir: Optional[Path] = None) -> T:
+    """
+    Returns 'parser(file_path)', loading it from the cache when the same parser
+    already parsed a file with the same content.
+
+    The parsed structure is pickled on disk, keyed by the hash of the input content
+    and the version of the parser, with an in-process LRU on top of it.
+    """
+    key = cache_key(parser, file_path)
+    if key in memory_cache:
+        memory_cache.move_to_end(key)
+        return memory_cache[key]
+
+    cache_file = Path(cache_dir or CACHE_DIR) / f"{key}.pickle"
+    try:
+        with open(cache_file, "rb") as file:
+            parsed = pickle.load(file)
+    except Exception:
+        # missing, corrupted or no longer loadable (e.g. a class was renamed)
+        parsed = parser(file_path)
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        temporary_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+        with open(temporary_file, "wb") as file:
+            pickle.dump(parsed, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_file, cache_file)
+
+    memory_cache[key] = parsed
+    if len(memory_cache) > LRU_SIZE:
+        memory_cache.popitem(last=False)
+    return parsed
@@ -0,0 +1,113 @@
+"""
+The part-independent parse of the input of each day, shared by both of its parts.
+
+Both parts of a day go through the same parser with 'cached_parse', so the cache
+key is the same for them and the second part loads what the first one parsed.
+The parsers only return plain tuples, lists, ints and strings: each part builds
+its own structures from them, so the pickles do not depend on the solution classes.
+
+Day 1 has no parser here: its sums are computed in a single scan of the raw bytes,
+which costs about as much as hashing the input for the cache key.
+"""
+import re
+from typing import List, Tuple
+
+CARD_PATTERN = r"^Card\s+(\d+):([\s*\d+\s*]+)\|([\s*\d+\s*]+)$"
+CARD_FORMAT_ERROR = "Line formatted in a wrong way. It should be like: 'Card 1: 41 48 83 86 17 | 83 86  6 31 17  9 48 53'"
+
+
+def parse_games(file_path: str) -> List[Tuple[int, int, int, int]]:
+    """
+    Returns the id and the maximum amount of red, green and blue cubes drawn of every game.
+    """
+    games = []
+    with open(file_path, "r") as file:
+        for line in file:
+            try:
+                header, draws = line.strip().split(":")
+                _, id = header.split()
+                maxima = {"red": 0, "green": 0, "blue": 0}
+                for cube in draws.replace(";", ",").split(","):
+                    quantity, color = cube.split()
+                    maxima[color] = max(maxima[color], int(quantity))
+            except Exception as e:
+                raise ValueError("Incorrect format of the game line") from e
+            games.append((int(id), maxima["red"], maxima["green"], maxima["blue"]))
+    return games
+
+
+def parse_schema(file_path: str) -> Tuple[List[Tuple[int, int, int, int]], List[Tuple[int, int, str]]]:
+    """
+    Returns the (value, first x, last x, y) of every number and the (x, y, character)
+    of every symbol of the engine schema.
+    """
+    numbers = []
+    symbols = []
+    with open(file_path) as file:
+        for y, line in enumerate(file.read().splitlines()):
+            numbers.extend(
+                (int(match.group(0)), match.start(0), match.end(0) - 1, y)
+                for match in re.finditer(r"(\d+)", line)
+            )
+            symbols.extend(
+                (match.start(0), y, match.group(0))
+                for match in re.finditer(r"[^\w\d\n.]", line)
+            )
+    return numbers, symbols
+
+
+def parse_cards(file_path: str) -> List[Tuple[int, List[int], List[int]]]:
+    """
+    Returns the id, the owned numbers and the winning numbers of every card.
+    """
+    cards = []
+    with open(file_path) as file:
+        for line in file:
+            match = re.match(CARD_PATTERN, line)
+            if not match:
+                raise ValueError(CARD_FORMAT_ERROR)
+            cards.append((
+                int(match.group(1)),
+                [int(n) for n in match.group(2).split()],
+                [int(n) for n in match.group(3).split()],
+            ))
+    return cards
+
+
+def parse_almanac(file_path: str) -> Tuple[List[int], List[Tuple[str, str, List[Tuple[int, int, int]]]]]:
+    """
+    Returns the numbers of the seeds line and the (source, target, ranges) of every
+    'X-to-Y map:' section, in the order of the file, with the (destination start,
+    source start, length) of each range. Each section must start from the category
+    the previous one ended in.
+    """
+    seeds = None
+    sections = []
+    with open(file_path, "r") as file:
+        for line in file:
+            line = line.strip()
+            if not line:
+                continue
+
+            if line.startswith("seeds:"):
+                match = re.search(r"\bseeds:\s*([\d\s]+)", line)
+                if not match:
+                    raise ValueError("Bad format in the seeds definition line")
+                seeds = [int(seed) for seed in match.group(1).split()]
+                continue
+
+            header = re.match(r"^(\w+)-to-(\w+) map:$", line)
+            if header:
+                source, target = header.groups()
+                if sections and source != sections[-1][1]:
+                    raise ValueError(f"Map '{line}' does not start from the '{sections[-1][1]}' category")
+                sections.append((source, target, []))
+            elif sections:
+                dst_start, src_start, range_length = [int(v) for v in line.split()]
+                sections[-1][2].append((dst_start, src_start, range_length))
+            else:
+                raise ValueError(f"Range line outside of a map section: '{line}'")
+
+    if seeds is None:
+        raise ValueError("Bad format in the seeds definition line")
+    return seeds, sections
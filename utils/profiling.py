@@ -0,0 +1,270 @@
+"""
+Per-stage profiling of the solutions: the time and the net allocated memory blocks
+of the parse and solve stages, and the counts of their hot operations.
+
+Nothing is instrumented by default. 'instrumented' wraps the functions and methods
+listed in PROBES for the duration of a run and restores them afterwards, so the
+solutions have no profiling code of their own and pay nothing when it is off.
+
+Example:
+    profiler = Profiler()
+    with instrumented(module, PROBES[(5, 2)], profiler), profiler.stage("solve"):
+        module.solve(input_path)
+    print(profiler.to_folded())
+"""
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass
+import functools
+import importlib
+import sys
+import time
+from types import ModuleType
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+
+@dataclass
+class Probe:
+    """
+    A function or method of a solution to instrument.
+
+    Attributes:
+        target (str): The 'function' or 'Class.method' path in the solution module.
+        stage (bool): Whether the calls are timed as a stage, or only counted.
+        work (Callable): Measures the work of a call from its result and arguments.
+        items (bool): Whether the work is the number of items consumed from the generator the target returns.
+        unit (str): The unit of the work, counted in the '<target>.<unit>' counter.
+        module (str): The module of the target when it is not the solution, e.g. 'utils.cache'.
+    """
+
+    target: str
+    stage: bool = True
+    work: Optional[Callable[..., int]] = None
+    items: bool = False
+    unit: str = "work"
+    module: Optional[str] = None
+
+
+class Profiler:
+    """
+    Collects the stages entered during a run, keyed by their stack of enclosing stages,
+    and the counters of the hot operations.
+
+    Attributes:
+        stages (Dict): The [calls, seconds, net allocated blocks] of every stack of stages.
+        counters (Counter): The counters of the operations.
+    """
+
+    def __init__(self) -> None:
+        self.stages: Dict[Tuple[str, ...], List] = {}
+        self.counters: Counter = Counter()
+        self.stack: List[str] = []
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        self.stack.append(name)
+        path = tuple(self.stack)
+        blocks = sys.getallocatedblocks()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            entry = self.stages.setdefault(path, [0, 0.0, 0])
+            entry[0] += 1
+            entry[1] += elapsed
+            # net memory blocks still allocated when the stage ends
+            entry[2] += sys.getallocatedblocks() - blocks
+            self.stack.pop()
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counters[name] += n
+
+    def self_seconds(self, path: Tuple[str, ...]) -> float:
+        """
+        Returns the time spent in the stage itself, outside of its nested stages.
+        """
+        children = sum(
+            seconds
+            for child, (_, seconds, _) in self.stages.items()
+            if len(child) == len(path) + 1 and child[:-1] == path
+        )
+        return max(self.stages[path][1] - children, 0.0)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "stages": [
+                {
+                    "stack": list(path),
+                    "calls": calls,
+                    "seconds": seconds,
+                    "self_seconds": self.self_seconds(path),
+                    "net_allocated_blocks": blocks,
+                }
+                for path, (calls, seconds, blocks) in self.stages.items()
+            ],
+            "counters": dict(self.counters),
+        }
+
+    def to_folded(self, prefix: Tuple[str, ...] = ()) -> str:
+        """
+        Returns the stages as folded stacks ('a;b;c <self microseconds>' per line),
+        the input format of flamegraph.pl, speedscope and inferno.
+        """
+        return "\n".join(
+            f"{';'.join(prefix + path)} {round(self.self_seconds(path) * 1_000_000)}"
+            for path in self.stages
+        )
+
+
+def resolve(module: ModuleType, target: str) -> Tuple[Any, str]:
+    """
+    Returns the owner (module or class) and the attribute name of a probe target,
+    mangling the name of the private methods like Python does.
+    """
+    owner = module
+    *parents, name = target.split(".")
+    for parent in parents:
+        owner = getattr(owner, parent)
+    if parents and name.startswith("__") and not name.endswith("__"):
+        name = f"_{owner.__name__.lstrip('_')}{name}"
+    return owner, name
+
+
+def wrap(function: Callable, probe: Probe, profiler: Profiler) -> Callable:
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        profiler.count(probe.target)
+        if probe.stage:
+            with profiler.stage(probe.target):
+                result = function(*args, **kwargs)
+        else:
+            result = function(*args, **kwargs)
+        if probe.work is not None:
+            profiler.count(f"{probe.target}.{probe.unit}", probe.work(result, *args, **kwargs))
+        if probe.items:
+            result = count_items(result, f"{probe.target}.{probe.unit}", profiler)
+        return result
+
+    return wrapper
+
+
+def count_items(iterator: Iterator, name: str, profiler: Profiler) -> Iterator:
+    """
+    Counts only the items actually consumed, e.g. stopping with a short-circuiting any().
+    """
+    for item in iterator:
+        profiler.count(name)
+        yield item
+
+
+def bisect_steps(result: int, mapping: Any, key: int) -> int:
+    """
+    Returns the comparisons 'bisect_right' made over the starts of the map to look up the key.
+    """
+    low, high, steps = 0, len(mapping.starts), 0
+    while low < high:
+        middle = (low + high) // 2
+        steps += 1
+        if key < mapping.starts[middle]:
+            high = middle
+        else:
+            low = middle + 1
+    return steps
+
+
+def propagations(result: List[int], cards: List[Any]) -> int:
+    """
+    Returns the cards 'count_copies' added instances to, one per card won by each card.
+    """
+    return sum(min(card.matches, len(cards) - i - 1) for i, card in enumerate(cards))
+
+
+@contextmanager
+def instrumented(module: ModuleType, probes: List[Probe], profiler: Profiler) -> Iterator[Profiler]:
+    """
+    Reports the calls of the probes of the solution module into the profiler until exiting.
+    """
+    originals = []
+    try:
+        for probe in probes:
+            owner, name = resolve(importlib.import_module(probe.module) if probe.module else module, probe.target)
+            original = owner.__dict__[name] if isinstance(owner, type) else getattr(owner, name)
+            if isinstance(original, property):
+                replacement = property(wrap(original.fget, probe, profiler))
+            elif isinstance(original, (staticmethod, classmethod)):
+                replacement = type(original)(wrap(original.__func__, probe, profiler))
+            else:
+                replacement = wrap(original, probe, profiler)
+            setattr(owner, name, replacement)
+            originals.append((owner, name, original))
+        yield profiler
+    finally:
+        for owner, name, original in reversed(originals):
+            setattr(owner, name, original)
+
+
+# the parse of the input, shared by both parts through the cache, whether it is parsed or loaded
+CACHED_PARSE = Probe("cached_parse", module="utils.cache")
+
+# the parse stages, the solve stages and the hot operations of what 'solve' runs
+PROBES: Dict[Tuple[int, int], List[Probe]] = {
+    (1, 1): [
+        Probe("sum_calibration_values"),
+    ],
+    (1, 2): [
+        Probe("sum_calibration_values"),
+        Probe("sum_calibration_chunk"),
+        Probe("DigitScanner.first", stage=False),
+        Probe("DigitScanner.last", stage=False),
+    ],
+    (2, 1): [
+        CACHED_PARSE,
+        Probe("sum_possible_ids"),
+    ],
+    (2, 2): [
+        CACHED_PARSE,
+        Probe("sum_powers"),
+    ],
+    (3, 1): [
+        CACHED_PARSE,
+        Probe("Engine.from_elements"),
+        Probe("Engine.get_part_numbers"),
+        Probe("Number.is_part_number", stage=False),
+        # the cells checked against the symbols until 'is_part_number' finds one
+        Probe("Number.neighbor_coordinates", stage=False, items=True, unit="cells_checked"),
+    ],
+    (3, 2): [
+        CACHED_PARSE,
+        Probe("Engine.from_elements"),
+        Probe("Engine.get_gears", work=lambda result, engine: len(result), unit="gears"),
+        # the cells checked against the '*' symbols by the neighbour sweep of 'get_gears'
+        Probe("Number.neighbor_coordinates", stage=False, items=True, unit="cells_checked"),
+    ],
+    (4, 1): [
+        CACHED_PARSE,
+        Probe("Card.from_numbers"),
+        Probe("Card.__count_matches", stage=False),
+    ],
+    (4, 2): [
+        CACHED_PARSE,
+        Probe("Card.from_numbers"),
+        Probe("Card.__count_matches", stage=False),
+        Probe("count_copies", work=propagations, unit="propagations"),
+    ],
+    (5, 1): [
+        CACHED_PARSE,
+        Probe("build_mappings"),
+        Probe("process_seeds"),
+        Probe("AlmanacMap.freeze"),
+        Probe("AlmanacMap.lookup", stage=False, work=bisect_steps, unit="bisect_steps"),
+        Probe("AlmanacMap.lookup_array", stage=False, work=lambda result, mapping, keys: len(keys), unit="keys"),
+    ],
+    (5, 2): [
+        CACHED_PARSE,
+        Probe("build_mappings"),
+        Probe("process_seed_ranges"),
+        Probe("AlmanacMap.freeze"),
+        Probe("AlmanacMap.lookup_range", stage=False, work=lambda result, mapping, start, end: len(result), unit="fragments"),
+    ],
+}
@@ -0,0 +1,156 @@
+"""
+Runs the solutions of the selected days and parts in a single command,
+importing only the requested solutions and reporting the time of each part.
+
+Example:
+    python -m utils.runner                 # every day and part on its own input.txt
+    python -m utils.runner 4 5 --parts 2   # part 2 of days 4 and 5
+    cat input.txt | python -m utils.runner 3 --input -
+    python -m utils.runner 5 --profile profile.folded --profile-format folded
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack, redirect_stdout
+from dataclasses import dataclass
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import List, Optional, Tuple
+
+from utils.profiling import PROBES, Profiler, instrumented
+from utils.solutions import discover_solutions, input_path, load_solution
+
+
+@dataclass
+class PartResult:
+    """
+    Represents the outcome of running the solution of a day and part.
+
+    Attributes:
+        day (int): The day of the solution.
+        part (int): The part of the solution.
+        answer (int): The answer, if the solution succeeded.
+        error (str): The error raised by the solution, if any.
+        import_seconds (float): The time spent importing the solution.
+        solve_seconds (float): The time spent solving the puzzle.
+        profiler (Profiler): The stages and counters of the run, if profiled.
+    """
+
+    day: int
+    part: int
+    answer: Optional[int] = None
+    error: Optional[str] = None
+    import_seconds: float = 0.0
+    solve_seconds: float = 0.0
+    profiler: Optional[Profiler] = None
+
+
+def run_part(day: int, part: int, file_path: str, profile: bool = False) -> PartResult:
+    result = PartResult(day=day, part=part)
+    try:
+        start = time.perf_counter()
+        module = load_solution(day, part)
+        imported_at = time.perf_counter()
+        with ExitStack() as stack:
+            stack.enter_context(redirect_stdout(stack.enter_context(open(os.devnull, "w"))))
+            if profile:
+                result.profiler = Profiler()
+                stack.enter_context(instrumented(module, PROBES.get((day, part), []), result.profiler))
+                stack.enter_context(result.profiler.stage("solve"))
+            result.answer = module.solve(file_path)
+        solved_at = time.perf_counter()
+        result.import_seconds = imported_at - start
+        result.solve_seconds = solved_at - imported_at
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+    return result
+
+
+def run(
+    solutions: List[Tuple[int, int]],
+    file_path: Optional[str] = None,
+    jobs: int = 1,
+    profile: bool = False,
+) -> List[PartResult]:
+    """
+    Runs the given (day, part) solutions on their own input, or on 'file_path' if given,
+    spreading them over 'jobs' processes. With 'profile' every run reports into a Profiler.
+    """
+    paths = [file_path or str(input_path(day)) for day, _ in solutions]
+    if jobs <= 1:
+        return [run_part(day, part, path, profile) for (day, part), path in zip(solutions, paths)]
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [
+            executor.submit(run_part, day, part, path, profile)
+            for (day, part), path in zip(solutions, paths)
+        ]
+        return [future.result() for future in futures]
+
+
+def write_profile(results: List[PartResult], output: str, format: str) -> None:
+    profiled = [result for result in results if result.profiler is not None]
+    with open(output, "w") as file:
+        if format == "json":
+            profiles = {f"day-{r.day:02d}/part-{r.part}": r.profiler.to_dict() for r in profiled}
+            json.dump(profiles, file, indent=2)
+        else:
+            stacks = [r.profiler.to_folded(prefix=(f"day-{r.day:02d}", f"part-{r.part}")) for r in profiled]
+            file.write("\n".join(stacks) + "\n")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    available = discover_solutions()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("days", type=int, nargs="*", help="the days to run (default: all)")
+    parser.add_argument("--parts", type=int, nargs="+", default=[1, 2], help="the parts to run")
+    parser.add_argument("--input", help="input file used instead of the input.txt of the day, '-' for stdin")
+    parser.add_argument("--jobs", type=int, default=min(len(available), os.cpu_count() or 1), help="processes to use")
+    parser.add_argument("--profile", help="file where the stages and counters of every part are written")
+    parser.add_argument("--profile-format", choices=["json", "folded"], default="json", help="'folded' for flame graphs")
+    args = parser.parse_args(argv)
+
+    solutions = [
+        (day, part)
+        for day, part in available
+        if (not args.days or day in args.days) and part in args.parts
+    ]
+    if not solutions:
+        parser.error("no solution matches the selected days and parts")
+    if args.input and len({day for day, _ in solutions}) > 1:
+        parser.error("an explicit --input can only be used with a single day")
+
+    file_path = args.input
+    temporary_directory = None
+    if file_path == "-":
+        # the solutions read (and memory-map) files, so stdin is spooled to disk
+        temporary_directory = tempfile.mkdtemp()
+        file_path = os.path.join(temporary_directory, "input.txt")
+        with open(file_path, "wb") as file:
+            shutil.copyfileobj(sys.stdin.buffer, file)
+
+    try:
+        start = time.perf_counter()
+        results = run(solutions, file_path, min(args.jobs, len(solutions)), profile=bool(args.profile))
+        elapsed = time.perf_counter() - start
+    finally:
+        if temporary_directory is not None:
+            shutil.rmtree(temporary_directory)
+
+    for result in results:
+        outcome = result.answer if result.error is None else f"error ({result.error})"
+        print(
+            f"Day {result.day:02d} part {result.part}: {outcome}"
+            f"  [import {result.import_seconds * 1000:.1f}ms, solve {result.solve_seconds * 1000:.1f}ms]"
+        )
+    print(f"Total: {elapsed * 1000:.1f}ms")
+    if args.profile:
+        write_profile(results, args.profile, args.profile_format)
+    return 1 if any(result.error for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
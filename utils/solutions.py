@@ -0,0 +1,56 @@
+import importlib
+import importlib.abc
+import importlib.util
+from pathlib import Path
+import re
+import sys
+from types import ModuleType
+from typing import List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def discover_solutions() -> List[Tuple[int, int]]:
+    """
+    Returns the (day, part) of every 'day-XX/part-Y/solution.py' of the repository.
+    """
+    solutions = []
+    for path in ROOT.glob("day-*/part-*/solution.py"):
+        match = re.match(r"day-(\d+)/part-(\d+)", path.parent.relative_to(ROOT).as_posix())
+        if match:
+            solutions.append((int(match.group(1)), int(match.group(2))))
+    return sorted(solutions)
+
+
+def solution_path(day: int, part: int) -> Path:
+    return ROOT / f"day-{day:02d}" / f"part-{part}" / "solution.py"
+
+
+def input_path(day: int) -> Path:
+    return ROOT / f"day-{day:02d}" / "input.txt"
+
+
+class SolutionFinder(importlib.abc.MetaPathFinder):
+    """
+    Makes the solutions importable as 'day_XX_part_Y' modules, so that their
+    functions can also be pickled to (and found by) spawned worker processes.
+    """
+
+    def find_spec(self, fullname, path, target=None):
+        match = re.fullmatch(r"day_(\d+)_part_(\d+)", fullname)
+        if match:
+            file_path = solution_path(int(match.group(1)), int(match.group(2)))
+            if file_path.exists():
+                return importlib.util.spec_from_file_location(fullname, file_path)
+        return None
+
+
+if not any(isinstance(finder, SolutionFinder) for finder in sys.meta_path):
+    sys.meta_path.append(SolutionFinder())
+
+
+def load_solution(day: int, part: int) -> ModuleType:
+    """
+    Imports the solution of a day and part as the 'day_XX_part_Y' module, only once.
+    """
+    return importlib.import_module(f"day_{day:02d}_part_{part}")